@@ -1,15 +1,51 @@
 """
 AI judges implementation for the Reverse Turing Test game.
 """
-import os
-import openai
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
-
-# Set OpenAI API key
-openai.api_key = os.getenv("OPENAI_API_KEY")
+import functools
+import logging
+import random
+import re
+from collections import Counter
+import orjson
+from openai_client import (
+    API_ERROR_RESPONSE, cache_response, chat_completion, chat_completion_async, get_cached_response,
+    parse_structured_vote, response_cache_key, run_concurrently, stream_chat_completion, vote_response_format
+)
+
+logger = logging.getLogger(__name__)
+
+# Model used by every judge
+JUDGE_MODEL = "gpt-4o"
+
+# Opening line of every prompt that embeds the game history. Keeping it (and the history
+# right after it) at the very start of the prompt lets OpenAI's prompt caching reuse the prefix.
+GAME_HISTORY_PREAMBLE = "Game history (one player is human, the rest are AI):\n\n"
+
+# Short description of each judging approach
+APPROACH_DESCRIPTIONS = {
+    'human_traits': "spot human traits such as emotional depth, personal anecdotes, humor, or unique perspectives",
+    'odd_one_out': "spot the odd one out whose style, structure, or content breaks the group's pattern; "
+                   "ignore human-like traits, which modern AI imitates",
+    'mixed': "weigh human traits against pattern-breaking behavior; modern AI is advanced, so be careful",
+}
+
+# Judge persona per approach, formatted with the judge's name
+SYSTEM_PROMPTS = {
+    approach: "You are Judge {name}, finding the one human player among AI players. Approach: " + description + "."
+    for approach, description in APPROACH_DESCRIPTIONS.items()
+}
+
+# System prompt of requests that answer for the whole judging panel at once
+PANEL_SYSTEM_PROMPT = "You are a panel of judges, each finding the one human player among AI players."
+
+# Directive shared by every prompt that asks for a single character name
+NAME_ONLY_INSTRUCTION = "Reply with the character's name only."
+
+# Output token caps per call type; a vote is a single name, a suspicion 1-2
+# sentences and a discussion message 2-3 sentences
+VOTE_MAX_TOKENS = 16
+ANALYSIS_MAX_TOKENS = 60
+DISCUSSION_MAX_TOKENS = 80
 
 class AIJudge:
     def __init__(self, name, approach):
@@ -24,6 +60,23 @@ class AIJudge:
         self.approach = approach
         self.suspicions = []
         self.vote = None
+        # Sent as the system message of every request, byte-identical across the game
+        # so OpenAI's prompt caching can reuse it as the prefix
+        self.system_prompt = SYSTEM_PROMPTS[approach].format(name=name)
+        self._responses_table = ((), [])
+    
+    def __getstate__(self):
+        """Pickle without the system prompt and responses table, which are derived data."""
+        state = self.__dict__.copy()
+        del state['system_prompt']
+        del state['_responses_table']
+        return state
+    
+    def __setstate__(self, state):
+        """Restore a pickled judge, rebuilding its derived data."""
+        self.__dict__.update(state)
+        self.system_prompt = SYSTEM_PROMPTS[self.approach].format(name=self.name)
+        self._responses_table = ((), [])
     
     def analyze_responses(self, all_characters, question, round_num):
         """
@@ -39,292 +92,440 @@ class AIJudge:
         """
         try:
             prompt = self._create_analysis_prompt(all_characters, question, round_num)
-            suspicion = self._call_openai_api(prompt)
+            suspicion = self._call_openai_api(prompt, max_tokens=ANALYSIS_MAX_TOKENS)
             self.suspicions.append(suspicion)
             return suspicion
         except Exception as e:
-            print(f"Error generating AI judge analysis: {e}")
+            logger.error("Error generating AI judge analysis: %s", e)
+            return f"[System: Error generating suspicion for Judge {self.name}]"
+    
+    async def analyze_responses_async(self, all_characters, question, round_num):
+        """
+        Async variant of analyze_responses, so several judges can be awaited together.
+        
+        Args:
+            all_characters: List of all Character objects
+            question: Current Question object
+            round_num: Current round number
+        
+        Returns:
+            str: Suspicion statement
+        """
+        try:
+            prompt = self._create_analysis_prompt(all_characters, question, round_num)
+            suspicion = await self._call_openai_api_async(prompt, max_tokens=ANALYSIS_MAX_TOKENS)
+            self.suspicions.append(suspicion)
+            return suspicion
+        except Exception as e:
+            logger.error("Error generating AI judge analysis: %s", e)
             return f"[System: Error generating suspicion for Judge {self.name}]"
     
     def generate_vote(self, all_characters, all_questions):
         """
         Generate final vote on who is the human.
+        
+        Args:
+            all_characters: List of all Character objects
+            all_questions: List of Question objects asked so far
+        
+        Returns:
+            str: Name of the character voted as human
+        """
+        try:
+            prompt = self._create_vote_prompt(all_characters, all_questions)
+            # A vote is a deterministic function of the game so far, so it is cached
+            response = self._call_openai_api_cached(
+                prompt, vote_response_format(["vote"], all_characters), max_tokens=VOTE_MAX_TOKENS
+            )
+            return self._extract_vote(response, all_characters)
+        except Exception as e:
+            logger.error("Error generating AI judge vote: %s", e)
+            # Vote for a random character if there's an error
+            return random.choice([char.name for char in all_characters])
+    
+    async def generate_vote_async(self, all_characters, all_questions):
+        """Async variant of generate_vote."""
+        try:
+            prompt = self._create_vote_prompt(all_characters, all_questions)
+            response = await self._call_openai_api_async_cached(
+                prompt, vote_response_format(["vote"], all_characters), max_tokens=VOTE_MAX_TOKENS
+            )
+            return self._extract_vote(response, all_characters)
+        except Exception as e:
+            logger.error("Error generating AI judge vote: %s", e)
+            # Vote for a random character if there's an error
+            return random.choice([char.name for char in all_characters])
+    
+    @classmethod
+    def analyze_all(cls, judges, all_characters, question, round_num):
         """
-        prompt = self._create_vote_prompt(all_characters, all_questions)
-        response = self._call_openai_api(prompt)
+        Get every judge's analysis of a round.
         
-        # Extract the character name from the response
-        for char in all_characters:
-            if char.name.lower() in response.lower():
-                return char.name
+        The round's responses are sent once in a single batched request; if its
+        reply is unusable, the judges are asked concurrently instead.
+        
+        Returns:
+            list: Suspicion statements, in the same order as judges
+        """
+        answers = cls.batch_round(
+            judges,
+            _format_round_responses(judges[0]._get_responses_table(all_characters), question, round_num),
+            "in 1-2 sentences per judge, name the player each judge suspects is human and why.",
+            answer_max_tokens=ANALYSIS_MAX_TOKENS
+        )
+        if answers is None:
+            return run_concurrently(
+                judge.analyze_responses_async(all_characters, question, round_num) for judge in judges
+            )
+        
+        suspicions = [answers[judge.name] for judge in judges]
+        for judge, suspicion in zip(judges, suspicions):
+            judge.suspicions.append(suspicion)
+        return suspicions
+    
+    @classmethod
+    def vote_all(cls, judges, all_characters, all_questions):
+        """
+        Get every judge's vote on who is the human.
+        
+        The votes come from one batched request, falling back to concurrent
+        per-judge requests if the batched reply is unusable.
+        
+        Returns:
+            dict: Vote per judge name, in the same order as judges
+        """
+        judge_votes = judges[0]._batch_votes(judges, all_characters, all_questions)
+        if judge_votes is None:
+            votes = run_concurrently(
+                judge.generate_vote_async(all_characters, all_questions) for judge in judges
+            )
+            judge_votes = {judge.name: vote for judge, vote in zip(judges, votes)}
+        return judge_votes
+    
+    @classmethod
+    def batch_round(cls, judges, shared_prompt, task, judge_context=None, deterministic=False, choices=None,
+                    answer_max_tokens=VOTE_MAX_TOKENS):
+        """
+        Ask every judge for their answer in a single request.
+        
+        The shared context is sent once instead of once per judge, and the model
+        answers for each judge in a JSON object keyed by judge name.
+        
+        Args:
+            judges: List of AIJudge objects
+            shared_prompt (str): Context shared by all judges
+            task (str): What each judge has to answer
+            judge_context (dict): Optional extra context per judge name
+            deterministic (bool): Sample at temperature 0 and reuse cached replies
+            choices (list): Optional Character objects each answer is constrained to
+            answer_max_tokens (int): Output token budget for each judge's answer
+        
+        Returns:
+            dict: Answer per judge name, or None if the reply could not be parsed
+        """
+        judge_context = judge_context or {}
+        judge_lines = []
+        for judge in judges:
+            judge_lines.append(f"- {judge.name}: {APPROACH_DESCRIPTIONS[judge.approach]}")
+            if judge.name in judge_context:
+                judge_lines.append(f"  {judge_context[judge.name]}")
+        judge_names = [judge.name for judge in judges]
+        
+        prompt = f"""{shared_prompt}
+
+Judges and approaches:
+{chr(10).join(judge_lines)}
+
+Task: {task}
+Answer independently for each judge, following their own approach.
+Reply with a JSON object with the keys {', '.join(judge_names)}, whose values are each judge's answer.
+"""
+        if choices:
+            response_format = vote_response_format(judge_names, choices)
+        else:
+            response_format = {"type": "json_object"}
+        # Each answer also carries its JSON key and punctuation
+        max_tokens = (answer_max_tokens + 8) * len(judges)
+        if deterministic:
+            response = judges[0]._call_openai_api_cached(
+                prompt, response_format, max_tokens, system_prompt=PANEL_SYSTEM_PROMPT
+            )
+        else:
+            response = judges[0]._call_openai_api(
+                prompt, response_format, max_tokens=max_tokens, system_prompt=PANEL_SYSTEM_PROMPT
+            )
+        
+        try:
+            answers = orjson.loads(response)
+        except ValueError:
+            return None
+        if not isinstance(answers, dict) or not all(isinstance(answers.get(name), str) for name in judge_names):
+            return None
+        return {name: answers[name].strip() for name in judge_names}
+    
+    def _extract_vote(self, response, all_characters):
+        """Extract the voted character name from a structured (or, failing that, free-text) response."""
+        vote = parse_structured_vote(response, all_characters) or _find_character_name(response, all_characters)
+        if vote:
+            return vote
         
         # If no character name found, return a random one
         return random.choice([char.name for char in all_characters])
+    
+    def _batch_votes(self, judges, all_characters, all_questions):
+        """
+        Get the initial vote of every judge with a single request.
         
-    def discuss(self, other_judges, all_characters, all_questions, max_rounds=3):
-        """Discuss with other judges to try to reach a consensus."""
-        # Initial votes from all judges
-        judge_votes = {}
-        for judge in [self] + other_judges:
-            judge_votes[judge.name] = judge.generate_vote(all_characters, all_questions)
-            
-        # Check if there's already a consensus
-        vote_counts = {}
-        for vote in judge_votes.values():
-            vote_counts[vote] = vote_counts.get(vote, 0) + 1
+        Returns:
+            dict: Vote per judge name, or None if the batched reply was unusable
+        """
+        game_history = self._build_game_history(all_characters, all_questions)
+        
+        judge_context = {}
+        for judge in judges:
+            if judge.suspicions:
+                judge_context[judge.name] = "Suspicions by round: " + " | ".join(
+                    f"\"{suspicion}\"" for suspicion in judge.suspicions
+                )
+        
+        answers = self.batch_round(
+            judges,
+            GAME_HISTORY_PREAMBLE + game_history,
+            "which character does each judge think is the human player? "
+            f"Each answer must be exactly one of these names: {', '.join(char.name for char in all_characters)}",
+            judge_context,
+            deterministic=True,
+            choices=all_characters
+        )
+        if answers is None:
+            return None
+        
+        votes = {name: _find_character_name(answer, all_characters) for name, answer in answers.items()}
+        if not all(votes.values()):
+            return None
+        return votes
+    
+    def _batch_post_discussion_votes(self, judges, discussion_history, judge_votes, all_characters):
+        """
+        Get every judge's vote after a discussion round with a single request.
+        
+        Returns:
+            dict: Vote per judge name, or None if the batched reply was unusable
+        """
+        discussion_summary = _format_discussion_history(discussion_history)
+        
+        answers = self.batch_round(
+            judges,
+            f"Judges' discussion of a game where one player is human and the rest are AI:\n{discussion_summary}",
+            "after this discussion, which character does each judge now believe is the HUMAN player? "
+            f"Each answer must be exactly one of these names: {', '.join(char.name for char in all_characters)}",
+            {judge.name: f"Previously voted for {judge_votes[judge.name]}." for judge in judges},
+            deterministic=True,
+            choices=all_characters
+        )
+        if answers is None:
+            return None
+        
+        votes = {name: _find_character_name(answer, all_characters) for name, answer in answers.items()}
+        if not all(votes.values()):
+            return None
+        return votes
+        
+    def discuss(self, other_judges, all_characters, all_questions, max_rounds=3, initial_votes=None,
+                on_message_delta=None):
+        """
+        Discuss with other judges to try to reach a consensus.
+        
+        Args:
+            other_judges: List of the other AIJudge objects
+            all_characters: List of all Character objects
+            all_questions: List of Question objects asked in the game
+            max_rounds (int): Maximum number of discussion rounds
+            initial_votes (dict): Votes per judge name already collected by the caller
+                (e.g. with vote_all); requested here if not given
+            on_message_delta (callable): Optional callback(round_num, judge_name, text) called
+                with each piece of a discussion message as it is generated
+        
+        Returns:
+            tuple: (final verdict, discussion history)
+        """
+        judges = [self] + other_judges
+        judge_votes = dict(initial_votes) if initial_votes else self.vote_all(judges, all_characters, all_questions)
             
-        # If all judges agree, no need for discussion
-        if len(vote_counts) == 1:
-            return list(judge_votes.values())[0], []
+        # If all judges already agree, no need for discussion
+        if len(set(judge_votes.values())) == 1:
+            return next(iter(judge_votes.values())), []
             
+        # Matches "Name:" speaker tags the judges sometimes put in their messages
+        judge_name_re = re.compile(r"(?:%s):\s*" % "|".join(re.escape(judge.name) for judge in judges))
+        
         # Start discussion
         discussion_history = []
         current_round = 1
         consensus_reached = False
         
-        print(f"\n=== STARTING JUDGE DISCUSSION ===\n")
-        print(f"Initial votes: {judge_votes}\n")
-        print(f"=== DEBUG: JUDGE DISCUSSION DATA ===\n")
+        logger.info("Starting judge discussion. Initial votes: %s", judge_votes)
         
         while current_round <= max_rounds and not consensus_reached:
-            print(f"\n--- DISCUSSION ROUND {current_round} ---")
-            round_messages = []
+            logger.debug("Discussion round %d", current_round)
             
             # Each judge contributes to the discussion
             round_messages = []
-            current_round_discussion = ""
+            current_round_parts = []
             
-            for judge in [self] + other_judges:
+            # Judges speak in turn, since each one responds to the comments made before it
+            for judge in judges:
                 # Create a discussion prompt for each judge that includes previous judges' comments in this round
                 judge_discussion_prompt = self._create_discussion_prompt(
-                    judge_votes, discussion_history, all_characters, all_questions, current_round, judge.name, current_round_discussion
+                    judge_votes, discussion_history, all_characters, all_questions, current_round, judge.name, "".join(current_round_parts)
                 )
                 
-                print(f"Getting response from Judge {judge.name}...")
-                judge_message = judge._call_openai_api(judge_discussion_prompt)
+                logger.debug("Getting response from Judge %s", judge.name)
+                on_delta = None
+                if on_message_delta:
+                    on_delta = lambda delta, judge_name=judge.name: on_message_delta(current_round, judge_name, delta)
+                judge_message = judge._call_openai_api(
+                    judge_discussion_prompt, max_tokens=DISCUSSION_MAX_TOKENS, on_delta=on_delta
+                )
                 
                 # Validate and clean up the judge's message
-                # Remove any instances where the judge included their own name
-                for name in ["Holmes:", "Watson:", "Poirot:"]:
-                    if name in judge_message:
-                        judge_message = judge_message.replace(name, "")
+                # Remove any instances where the judge included a judge's name
+                judge_message = judge_name_re.sub("", judge_message)
                 
                 # If the message is too long, truncate it
                 if len(judge_message) > 300:
                     judge_message = judge_message[:297] + "..."
                 
-                print(f"Judge {judge.name}: {judge_message}")
+                logger.debug("Judge %s: %s", judge.name, judge_message)
                 round_messages.append({"judge": judge.name, "message": judge_message})
                 
                 # Add this judge's message to the current round discussion for the next judge to see
-                current_round_discussion += f"Judge {judge.name}: {judge_message}\n"
+                current_round_parts.append(f"Judge {judge.name}: {judge_message}\n")
             
             # Add this round to the discussion history
             discussion_history.append(round_messages)
             
-            # Display detailed discussion information for debugging
-            print(f"Discussion history length: {len(discussion_history)}")
-            print(f"Round {current_round} messages: {len(round_messages)}")
-            for msg in round_messages:
-                print(f"  Judge {msg['judge']}: {msg['message']}")
-            
-            # Update votes based on the discussion
-            new_votes = {}
-            for judge in [self] + other_judges:
-                vote_prompt = self._create_post_discussion_vote_prompt(
-                    discussion_history, judge_votes, all_characters, judge.name
-                )
-                response = judge._call_openai_api(vote_prompt)
-                
-                # Extract the character name from the response
-                new_vote = None
-                # Clean up the response to just get the name
-                clean_response = response.strip().lower()
-                
-                # Try to match exact character names
-                for char in all_characters:
-                    if char.name.lower() == clean_response or f"{char.name.lower()}." == clean_response:
-                        new_vote = char.name
-                        break
-                
-                # If no exact match, try to find the name in the response
-                if not new_vote:
-                    for char in all_characters:
-                        if char.name.lower() in clean_response:
-                            new_vote = char.name
-                            break
-                
-                # Log the vote extraction
-                print(f"Judge {judge.name} response: '{response}' -> Extracted vote: {new_vote or 'None'}")
-                
-                if not new_vote:
-                    new_vote = judge_votes[judge.name]  # Keep previous vote if no clear answer
-                    print(f"No clear vote extracted, keeping previous vote: {new_vote}")
-                    
-                new_votes[judge.name] = new_vote
+            # Update votes based on the discussion; the judges vote independently,
+            # so their votes are batched into one request (or requested concurrently)
+            new_votes = self._batch_post_discussion_votes(judges, discussion_history, judge_votes, all_characters)
+            if new_votes is None:
+                new_votes = dict(zip(
+                    [judge.name for judge in judges],
+                    run_concurrently(
+                        self._post_discussion_vote_async(judge, discussion_history, judge_votes, all_characters)
+                        for judge in judges
+                    )
+                ))
+            else:
+                logger.debug("Batched post-discussion votes: %s", new_votes)
             
             # Update judge votes
             judge_votes = new_votes
             
-            # Check if consensus is reached
-            vote_counts = {}
-            for vote in judge_votes.values():
-                vote_counts[vote] = vote_counts.get(vote, 0) + 1
+            # Log current votes after this round
+            logger.info("Votes after round %d: %s", current_round, judge_votes)
             
-            # Print current votes after this round
-            print(f"\nVotes after round {current_round}:")
-            for judge_name, vote in judge_votes.items():
-                print(f"  Judge {judge_name} votes for: {vote}")
-                
-            if len(vote_counts) == 1:
+            # Check if consensus is reached
+            if len(set(judge_votes.values())) == 1:
                 consensus_reached = True
-                print(f"\nConsensus reached! All judges agree on: {list(vote_counts.keys())[0]}")
+                logger.info("Consensus reached! All judges agree on: %s", next(iter(judge_votes.values())))
             else:
-                print(f"\nNo consensus yet. Vote distribution: {vote_counts}")
+                logger.info("No consensus yet. Vote distribution: %s", Counter(judge_votes.values()))
                 
             current_round += 1
         
-        # Determine final verdict (majority vote)
-        final_votes = list(judge_votes.values())
-        vote_counts = {}
-        for vote in final_votes:
-            vote_counts[vote] = vote_counts.get(vote, 0) + 1
-            
-        # Find the character with the most votes
-        max_votes = 0
-        final_verdict = None
-        for character, count in vote_counts.items():
-            if count > max_votes:
-                max_votes = count
-                final_verdict = character
-        
-        # Print final verdict information
-        print(f"\n=== FINAL VERDICT ===")
-        print(f"Final votes: {judge_votes}")
-        print(f"Vote distribution: {vote_counts}")
-        print(f"Final verdict (majority): {final_verdict} with {max_votes} votes")
-        
-        # Display the complete discussion history
-        self._display_full_discussion_history(discussion_history)
-        
-        print(f"=== END OF JUDGE DISCUSSION ===\n")
+        # Determine final verdict (majority vote; ties go to the earliest vote)
+        vote_counts = Counter(judge_votes.values())
+        final_verdict, max_votes = vote_counts.most_common(1)[0]
+        
+        # Log final verdict information
+        logger.info("Final votes: %s. Vote distribution: %s", judge_votes, vote_counts)
+        logger.info("Final verdict (majority): %s with %d votes", final_verdict, max_votes)
+        
+        # Log the complete discussion history
+        if logger.isEnabledFor(logging.DEBUG):
+            self._display_full_discussion_history(discussion_history)
                 
         return final_verdict, discussion_history
     
+    async def _post_discussion_vote_async(self, judge, discussion_history, judge_votes, all_characters):
+        """Ask a judge for their vote after a discussion round."""
+        vote_prompt = self._create_post_discussion_vote_prompt(
+            discussion_history, judge_votes, all_characters, judge.name
+        )
+        # Picking a name from a fixed discussion is deterministic, so the reply can be cached
+        response = await judge._call_openai_api_async_cached(
+            vote_prompt, vote_response_format(["vote"], all_characters), VOTE_MAX_TOKENS
+        )
+        
+        # Extract the character name from the response
+        new_vote = parse_structured_vote(response, all_characters) or _find_character_name(response, all_characters)
+        
+        # Log the vote extraction
+        logger.debug("Judge %s response: '%s' -> Extracted vote: %s", judge.name, response, new_vote)
+        
+        if not new_vote:
+            new_vote = judge_votes[judge.name]  # Keep previous vote if no clear answer
+            logger.debug("No clear vote extracted, keeping previous vote: %s", new_vote)
+        
+        return new_vote
+    
+    def _build_game_history(self, all_characters, all_questions):
+        """
+        Build the round-by-round question and response history of the game.
+        
+        The history is memoized on the game's questions and responses, so the
+        judges' vote and discussion prompts all share one copy per game state.
+        """
+        return _history_block(
+            tuple((char.name, tuple(char.responses)) for char in all_characters),
+            tuple(question.text for question in all_questions)
+        )
+    
+    def _get_responses_table(self, all_characters):
+        """
+        Get the game's responses as a table of rows per round.
+        
+        Each row lists (character name, response) for every character that
+        answered that round. The table is rebuilt only when a response is added.
+        
+        Returns:
+            list: One list of (name, response) tuples per round
+        """
+        response_counts = tuple(len(char.responses) for char in all_characters)
+        if self._responses_table[0] != response_counts:
+            table = [
+                [(char.name, char.responses[round_num]) for char in all_characters if round_num < len(char.responses)]
+                for round_num in range(max(response_counts, default=0))
+            ]
+            self._responses_table = (response_counts, table)
+        return self._responses_table[1]
+    
     def _create_analysis_prompt(self, all_characters, question, round_num):
         """Create prompt for analyzing responses."""
-        responses_text = ""
-        for char in all_characters:
-            if len(char.responses) >= round_num:
-                responses_text += f"{char.name}: \"{char.responses[round_num-1]}\"\n\n"
-        
-        if self.approach == 'human_traits':
-            prompt = f"""You are Judge {self.name}, an expert at identifying human responses in a game where one player is human and the rest are AI.
-
-This is round {round_num} of the game.
-Question that was asked: {question.text}
-
-Here are all the responses:
-{responses_text}
-
-As Judge {self.name}, analyze the responses and identify which one is likely the human.
-Look for characteristics that are typically human.
-
-Express your suspicions about who might be the human player in 1-2 sentences.
-Name specifically who you are suspecting and why they display human characteristics.
-"""
-        elif self.approach == 'odd_one_out':
-            prompt = f"""You are Judge {self.name}, an expert at identifying pattern breakers in a game where one player is human and the rest are AI.
-
-This is round {round_num} of the game.
-Question that was asked: {question.text}
-
-Here are all the responses:
-{responses_text}
-
-As Judge {self.name}, analyze the responses and identify which one seems different from the others. This is likely the human.
-Focus on identifying the "odd one out" rather than looking for specific human characteristics as you see this as misleading due to AI tools becoming more powerful.
-
-Express your suspicions about who might be the odd player in 1-2 sentences.
-Name specifically who you are suspecting and why they stand out from the group.
-"""
-        else:  # mixed approach
-            prompt = f"""You are Judge {self.name}, an expert at identifying humans in a game where one player is human and the rest are AI.
-
-This is round {round_num} of the game.
-Question that was asked: {question.text}
-
-Here are all the responses:
-{responses_text}
-
-As Judge {self.name}, analyze the responses using a balanced approach:
-1. Look for human like responses.
-2. Another good approach is to single out the "odd one out". This is likely the human.
-3. You realize AI is becoming more powerful and advanced, so you must be careful in your analysis.
-
-Express your suspicions about who might be the human player in 1-2 sentences.
-Name specifically who you are suspecting and provide your reasoning.
+        prompt = f"""{_format_round_responses(self._get_responses_table(all_characters), question, round_num)}
+Task: in 1-2 sentences, name the player you suspect is human and why.
 """
         
-        print(f"\n=== JUDGE {self.name} ANALYSIS PROMPT ===\n{prompt}\n===========\n")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Judge %s analysis prompt:\n%s", self.name, prompt)
         
         return prompt
     
     def _create_vote_prompt(self, all_characters, all_questions):
         """Create prompt for final vote."""
-        game_history = ""
-        for round_num in range(len(all_questions)):
-            game_history += f"--- ROUND {round_num+1} ---\n"
-            game_history += f"Question: {all_questions[round_num].text}\n\n"
-            
-            for char in all_characters:
-                if round_num < len(char.responses):
-                    game_history += f"{char.name}'s response: \"{char.responses[round_num]}\"\n"
-            
-            game_history += "\nMy suspicions after this round:\n"
-            if round_num < len(self.suspicions):
-                game_history += f"\"{self.suspicions[round_num]}\"\n"
-            game_history += "\n"
+        # The shared game history comes first so the prompt prefix is identical for all judges
+        game_history = self._build_game_history(all_characters, all_questions)
         
-        if self.approach == 'human_traits':
-            prompt = f"""You are Judge {self.name}, an expert at identifying human responses in a game where one player is human and the rest are AI.
-
-Here is the complete game history:
-{game_history}
-
-Based on all the responses throughout the game, analyze which character is likely the human player.
-
-
-Which character do you think is the human player?
-Respond with just the character's name that you're voting for.
-"""
-        elif self.approach == 'odd_one_out':
-            prompt = f"""You are Judge {self.name}, an expert at identifying pattern breakers in a game where one player is human and the rest are AI.
-
-Here is the complete game history:
-{game_history}
-
-Analyze all responses to identify which character is the "odd one out" from the group.
-Look for patterns that most characters follow and identify who breaks these patterns.
-Focus on identifying differences in response style, consistency, and uniqueness compared to the group.
-Avoid focusing solely on "human-like" characteristics, as this can be misleading with today's AI becoming more complex.
-
-Based on your analysis of who stands out from the group, which character do you think is the human player?
-Respond with just the character's name that you're voting for.
-"""
-        else:  # mixed approach
-            prompt = f"""You are Judge {self.name}, an expert at identifying humans in a game where one player is human and the rest are AI.
-
-Here is the complete game history:
-{game_history}
-
-Using a balanced approach that considers both human traits and pattern-breaking behavior:
-1. Analyze which character showed human traits.
-2. Identify which character was the "odd one out" in terms of response patterns.
-
-
-Based on your comprehensive analysis, which character do you think is the human player?
-Respond with just the character's name that you're voting for.
+        suspicions_text = "".join(
+            f"After round {round_num+1}: \"{suspicion}\"\n"
+            for round_num, suspicion in enumerate(self.suspicions[:len(all_questions)])
+        )
+        
+        prompt = f"""{GAME_HISTORY_PREAMBLE}{game_history}
+Your suspicions during the game:
+{suspicions_text}
+Task: which character is the human player? {NAME_ONLY_INSTRUCTION}
 """
         
         return prompt
@@ -332,92 +533,29 @@ Respond with just the character's name that you're voting for.
     def _create_discussion_prompt(self, judge_votes, discussion_history, all_characters, all_questions, current_round, judge_name=None, current_round_discussion=None):
         """Create prompt for judges to discuss their votes."""
         # Create a summary of the game
-        game_summary = ""
-        for round_num in range(len(all_questions)):
-            game_summary += f"--- ROUND {round_num+1} ---\n"
-            game_summary += f"Question: {all_questions[round_num].text}\n\n"
-            
-            for char in all_characters:
-                if round_num < len(char.responses):
-                    game_summary += f"{char.name}'s response: \"{char.responses[round_num]}\"\n"
-            game_summary += "\n"
+        game_summary = self._build_game_history(all_characters, all_questions)
         
         # Create a summary of current votes
-        votes_summary = "Current votes:\n"
-        for judge_name, vote in judge_votes.items():
-            votes_summary += f"{judge_name} votes for: {vote}\n"
+        votes_summary = "Current votes:\n" + "".join(
+            f"{name} votes for: {vote}\n" for name, vote in judge_votes.items()
+        )
         
         # Create a summary of previous discussion rounds
-        discussion_summary = ""
-        for round_idx, round_messages in enumerate(discussion_history):
-            discussion_summary += f"\n--- DISCUSSION ROUND {round_idx + 1} ---\n"
-            for message in round_messages:
-                discussion_summary += f"{message['judge']}: {message['message']}\n"
+        discussion_summary = _format_discussion_history(discussion_history)
         
         # Use the provided judge_name or default to self.name
         judge_name = judge_name or self.name
         
-        # Find the judge's approach based on the name
-        judge_approach = self.approach
-        if judge_name != self.name:
-            # Map judge names to their approaches
-            judge_approaches = {
-                'Holmes': 'human_traits',
-                'Watson': 'odd_one_out',
-                'Poirot': 'mixed'
-            }
-            if judge_name in judge_approaches:
-                judge_approach = judge_approaches[judge_name]
-        
-        # Create the prompt
-        prompt = f"""You are Judge {judge_name} participating in a panel discussion with other judges to determine who is the human player in a game.
-
-Game summary:
-{game_summary}
+        # Create the prompt (the speaking judge's persona is its system message),
+        # starting with the game summary shared by every judge's prompt
+        prompt = f"""{GAME_HISTORY_PREAMBLE}{game_summary}
+You are on a panel discussion with the other judges.
 
 {votes_summary}
-
 {discussion_summary}
-
---- DISCUSSION ROUND {current_round} ---"""
-        
-        # Add current round discussion if available
-        if current_round_discussion:
-            prompt += f"""
-{current_round_discussion}
-"""
-        
-        prompt += f"""
-It's now your turn to speak. Discuss your reasoning for your vote and respond to points raised by other judges.
-
-IMPORTANT INSTRUCTIONS:
-1. Speak ONLY as Judge {judge_name}. Do NOT simulate dialogue from other judges or characters.
-2. Do NOT include other names like "Holmes:", "Watson:", "Poirot:", etc. in your response.
-3. Do NOT create fictional dialogue or conversations within your response.
-4. Simply state your own opinion and reasoning directly.
-5. Keep your response concise (2-3 sentences).
-6. If other judges have already spoken in this round, MAKE SURE to respond to their points with your own perspective.
-7. Your perspective should be UNIQUE and different from other judges - do not simply repeat what they said.
-8. If you disagree with other judges, explain why. If you agree, add new insights.
-"""
-
-        # Add role-specific instructions based on the judge's approach
-        if judge_approach == 'human_traits':
-            prompt += """
-As Judge Holmes, you focus on identifying human traits in responses. Look for emotional depth, personal anecdotes, humor, or unique perspectives that suggest human thinking.
-"""
-        elif judge_approach == 'odd_one_out':
-            prompt += """
-As Judge Watson, you focus on identifying pattern breakers. Look for responses that stand out from the group in terms of style, structure, or content that break AI patterns.
-"""
-        else:  # mixed approach
-            prompt += """
-As Judge Poirot, you use a balanced approach that considers both human traits and pattern-breaking behavior. You should weigh both perspectives in your analysis.
-"""
-            
-        prompt += """
-
-Your response should be a single, direct statement of your own thoughts that contributes new information to the discussion.
+--- DISCUSSION ROUND {current_round} ---
+{current_round_discussion or ""}
+Task: your turn. In 2-3 sentences, speaking only as Judge {judge_name} (no names, no invented dialogue), give your own reasoning, respond to points already raised this round, and add a perspective the others have not.
 """
         
         return prompt
@@ -425,59 +563,166 @@ Your response should be a single, direct statement of your own thoughts that con
     def _create_post_discussion_vote_prompt(self, discussion_history, previous_votes, all_characters, judge_name):
         """Create prompt for judges to vote after discussion."""
         # Create a summary of the discussion
-        discussion_summary = ""
-        for round_idx, round_messages in enumerate(discussion_history):
-            discussion_summary += f"\n--- DISCUSSION ROUND {round_idx + 1} ---\n"
-            for message in round_messages:
-                discussion_summary += f"{message['judge']}: {message['message']}\n"
+        discussion_summary = _format_discussion_history(discussion_history)
         
         # Create the prompt
-        prompt = f"""You are Judge {judge_name} who previously voted for {previous_votes[judge_name]} as the human player.
+        prompt = f"""Judge {judge_name}, you previously voted for {previous_votes[judge_name]} as the human player.
 
-After discussing with other judges:
+Discussion with the other judges:
 {discussion_summary}
-
-IMPORTANT INSTRUCTIONS:
-1. Based on this discussion, which character do you now believe is the HUMAN player?
-2. Respond with ONLY the character's name - no explanation, no dialogue, no additional text.
-3. Your entire response should be a single name like "Alex" or "Jordan".
-4. Do NOT include any other text, quotes, or punctuation in your response.
-5. Your response must be exactly one of these character names: {', '.join([char.name for char in all_characters])}
-
-Your complete response (just the name):
+Task: which character do you now believe is the HUMAN player? Choose one of: {', '.join([char.name for char in all_characters])}
+{NAME_ONLY_INSTRUCTION}
 """
         
         return prompt
     
     def _display_full_discussion_history(self, discussion_history):
-        """Display the complete discussion history with detailed information."""
-        print("\n=== COMPLETE JUDGE DISCUSSION HISTORY ===")
-        print(f"Total discussion rounds: {len(discussion_history)}")
+        """Log the complete discussion history at debug level."""
+        logger.debug(
+            "Complete judge discussion history (%d rounds):%s",
+            len(discussion_history), _format_discussion_history(discussion_history)
+        )
+    
+    def _call_openai_api(self, prompt, response_format=None, temperature=0.7, max_tokens=150, system_prompt=None,
+                         on_delta=None):
+        """
+        Call OpenAI API with the given prompt, sent after the judge's system prompt.
         
-        for round_idx, round_messages in enumerate(discussion_history):
-            print(f"\n--- ROUND {round_idx + 1} DETAILED DISCUSSION ---")
-            print(f"Number of messages in this round: {len(round_messages)}")
-            
-            for msg in round_messages:
-                print(f"Judge {msg['judge']} said:")
-                print(f"{msg['message']}")
-                print("-" * 40)  # Separator between messages
+        If on_delta is given, the reply is streamed and each piece of text is
+        passed to it as it arrives; the complete reply is still returned.
+        """
+        try:
+            extra_args = {}
+            if response_format:
+                extra_args['response_format'] = response_format
+            request_args = dict(
+                model=JUDGE_MODEL,
+                messages=[
+                    {"role": "system", "content": system_prompt or self.system_prompt},
+                    {"role": "user", "content": prompt},
+                ],
+                max_tokens=max_tokens,
+                temperature=temperature,
+                **extra_args
+            )
+            if on_delta:
+                return stream_chat_completion(on_delta, **request_args).strip()
+            response = chat_completion(**request_args)
+            return response.strip()
+        except Exception as e:
+            logger.error("OpenAI API error: %s", e)
+            # Return a fallback response if API fails
+            return API_ERROR_RESPONSE
+    
+    def _call_openai_api_cached(self, prompt, response_format=None, max_tokens=150, system_prompt=None):
+        """Call OpenAI API at temperature 0, reusing the reply for a prompt seen before."""
+        cache_key = response_cache_key(JUDGE_MODEL, prompt, response_format, system_prompt or self.system_prompt)
+        cached = get_cached_response(cache_key)
+        if cached is not None:
+            return cached
         
-        print("\n=== END OF COMPLETE DISCUSSION HISTORY ===\n")
+        response = self._call_openai_api(
+            prompt, response_format, temperature=0, max_tokens=max_tokens, system_prompt=system_prompt
+        )
+        cache_response(cache_key, response)
+        return response
     
-    def _call_openai_api(self, prompt):
-        """Call OpenAI API with the given prompt."""
+    async def _call_openai_api_async(self, prompt, response_format=None, temperature=0.7, max_tokens=150,
+                                     system_prompt=None):
+        """Call OpenAI API with the given prompt without blocking the event loop."""
         try:
-            response = openai.ChatCompletion.create(
-                model="gpt-4o",
+            extra_args = {}
+            if response_format:
+                extra_args['response_format'] = response_format
+            response = await chat_completion_async(
+                model=JUDGE_MODEL,
                 messages=[
-                    {"role": "system", "content": prompt},
+                    {"role": "system", "content": system_prompt or self.system_prompt},
+                    {"role": "user", "content": prompt},
                 ],
-                max_tokens=150,
-                temperature=0.7,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                **extra_args
             )
-            return response.choices[0].message.content.strip()
+            return response.strip()
         except Exception as e:
-            print(f"OpenAI API error: {e}")
+            logger.error("OpenAI API error: %s", e)
             # Return a fallback response if API fails
-            return f"I'm having trouble connecting to my knowledge base right now."
+            return API_ERROR_RESPONSE
+    
+    async def _call_openai_api_async_cached(self, prompt, response_format=None, max_tokens=150, system_prompt=None):
+        """Async variant of _call_openai_api_cached."""
+        cache_key = response_cache_key(JUDGE_MODEL, prompt, response_format, system_prompt or self.system_prompt)
+        cached = get_cached_response(cache_key)
+        if cached is not None:
+            return cached
+        
+        response = await self._call_openai_api_async(
+            prompt, response_format, temperature=0, max_tokens=max_tokens, system_prompt=system_prompt
+        )
+        cache_response(cache_key, response)
+        return response
+
+
+@functools.lru_cache(maxsize=32)
+def _history_block(characters_sig, questions_sig):
+    """
+    Format the game history from its signature.
+    
+    Args:
+        characters_sig (tuple): (name, responses) per character
+        questions_sig (tuple): Text of each question asked
+    
+    Returns:
+        str: The round-by-round question and response history
+    """
+    parts = []
+    for round_num, question_text in enumerate(questions_sig):
+        parts.append(f"--- ROUND {round_num+1} ---\n")
+        parts.append(f"Question: {question_text}\n\n")
+        parts.extend(
+            f"{name}'s response: \"{responses[round_num]}\"\n"
+            for name, responses in characters_sig if round_num < len(responses)
+        )
+        parts.append("\n")
+    return "".join(parts)
+
+
+def _format_round_responses(responses_table, question, round_num):
+    """Format a round's question and every character's response (from the responses table) as text for a prompt."""
+    round_responses = responses_table[round_num-1] if round_num <= len(responses_table) else []
+    responses_text = "".join(f"{name}: \"{response}\"\n\n" for name, response in round_responses)
+    return f"Round {round_num}. Question: {question.text}\n\nResponses:\n{responses_text}"
+
+
+def _format_discussion_history(discussion_history):
+    """Format the judges' discussion rounds as text for a prompt."""
+    parts = []
+    for round_idx, round_messages in enumerate(discussion_history):
+        parts.append(f"\n--- DISCUSSION ROUND {round_idx + 1} ---\n")
+        parts.extend(f"{message['judge']}: {message['message']}\n" for message in round_messages)
+    return "".join(parts)
+
+
+def _find_character_name(response, all_characters):
+    """
+    Find the character name a free-text response refers to.
+    
+    Returns:
+        str: The character name, or None if no character is mentioned
+    """
+    # Clean up the response to just get the name
+    clean_response = response.strip().lower()
+    name_by_lower = {char.name.lower(): char.name for char in all_characters}
+    
+    # Fast path: the response is exactly a character name
+    name = name_by_lower.get(clean_response.rstrip("."))
+    if name:
+        return name
+    
+    # If no exact match, try to find the name in the response
+    for lower_name, name in name_by_lower.items():
+        if lower_name in clean_response:
+            return name
+    
+    return None
@@ -1,15 +1,32 @@
 """
 AI player implementation for the Reverse Turing Test game.
 """
-import os
-import openai
-from dotenv import load_dotenv
+import functools
+import re
+import orjson
+from openai_client import (
+    API_ERROR_RESPONSE, cache_response, chat_completion, chat_completion_async, get_cached_response,
+    parse_structured_vote, response_cache_key, run_concurrently, stream_chat_completion_async,
+    vote_response_format
+)
 
-# Load environment variables
-load_dotenv()
+# Model used by every AI player
+PLAYER_MODEL = "gpt-4o-mini"
 
-# Set OpenAI API key
-openai.api_key = os.getenv("OPENAI_API_KEY")
+# Output token budgets by reply length; a tighter ceiling also lowers latency
+RESPONSE_MAX_TOKENS = 150     # 2-3 sentences
+SHORT_REPLY_MAX_TOKENS = 80   # 1-2 sentences
+VOTE_MAX_TOKENS = 16          # a single character name, or {"vote": "<name>"}
+
+# Opening line of every AI player's system prompt
+ROLEPLAY_PREAMBLE = "Roleplay this character in a game where one player is human and the rest are AI."
+
+# Most recent rounds kept verbatim in the vote prompt's game history; older
+# rounds are compressed to the first sentence of each response and suspicion
+HISTORY_VERBATIM_ROUNDS = 1
+
+# What makes a player stand out as the human, shared by the analysis and vote prompts
+PATTERN_CRITERIA = "the one breaking the group's pattern in response style, consistency, or uniqueness"
 
 class AIPlayer:
     def __init__(self, character):
@@ -20,6 +37,20 @@ class AIPlayer:
             character: Character object representing this AI's persona
         """
         self.character = character
+        # Static character context, sent as the system message ahead of the per-call
+        # prompt so OpenAI's prompt caching can reuse it across the game
+        self.system_prompt = f"{ROLEPLAY_PREAMBLE}\n\n{character.get_prompt_description()}"
+    
+    def __getstate__(self):
+        """Pickle without the system prompt, which is derived from the character."""
+        state = self.__dict__.copy()
+        del state['system_prompt']
+        return state
+    
+    def __setstate__(self, state):
+        """Restore a pickled AI player, rebuilding its system prompt."""
+        self.__dict__.update(state)
+        self.system_prompt = f"{ROLEPLAY_PREAMBLE}\n\n{self.character.get_prompt_description()}"
         
     def generate_response(self, question, round_num):
         """
@@ -34,14 +65,31 @@ class AIPlayer:
         """
         try:
             prompt = self._create_response_prompt(question, round_num)
-            response = self._call_openai_api(prompt)
+            response = self._call_openai_api(prompt, system_prompt=self.system_prompt)
             self.character.add_response(response)
             return response
         except Exception as e:
             print(f"Error generating AI response: {e}")
             return f"[System: Error generating response for {self.character.name}]"
     
-    def analyze_responses(self, all_characters, question, round_num):
+    async def generate_response_async(self, question, round_num, on_delta=None):
+        """
+        Async variant of generate_response, so several players can be awaited together.
+        
+        With on_delta, the response is streamed and each text delta is passed to it as it arrives.
+        """
+        try:
+            prompt = self._create_response_prompt(question, round_num)
+            response = await self._call_openai_api_async(
+                prompt, system_prompt=self.system_prompt, on_delta=on_delta
+            )
+            self.character.add_response(response)
+            return response
+        except Exception as e:
+            print(f"Error generating AI response: {e}")
+            return f"[System: Error generating response for {self.character.name}]"
+    
+    def analyze_responses(self, all_characters, question, round_num, responses_text=None):
         """
         Analyze all character responses to identify the human.
         
@@ -49,135 +97,435 @@ class AIPlayer:
             all_characters: List of all Character objects
             question: Current Question object
             round_num: Current round number
+            responses_text (str): The round's responses already formatted for the prompt,
+                when shared by several players (built here if omitted)
         
         Returns:
             str: Suspicion statement
         """
         try:
-            prompt = self._create_analysis_prompt(all_characters, question, round_num)
-            suspicion = self._call_openai_api(prompt)
+            prompt = self._create_analysis_prompt(all_characters, question, round_num, responses_text)
+            suspicion = self._call_openai_api(
+                prompt, max_tokens=SHORT_REPLY_MAX_TOKENS, system_prompt=self.system_prompt
+            )
             self.character.add_suspicion(suspicion)
             return suspicion
         except Exception as e:
             print(f"Error generating AI analysis: {e}")
             return f"[System: Error generating suspicion for {self.character.name}]"
     
-    def generate_vote(self, all_characters):
+    async def analyze_responses_async(self, all_characters, question, round_num, responses_text=None):
+        """Async variant of analyze_responses."""
+        try:
+            prompt = self._create_analysis_prompt(all_characters, question, round_num, responses_text)
+            suspicion = await self._call_openai_api_async(
+                prompt, max_tokens=SHORT_REPLY_MAX_TOKENS, system_prompt=self.system_prompt
+            )
+            self.character.add_suspicion(suspicion)
+            return suspicion
+        except Exception as e:
+            print(f"Error generating AI analysis: {e}")
+            return f"[System: Error generating suspicion for {self.character.name}]"
+    
+    def generate_vote(self, all_characters, game_history=None):
         """
         Generate final vote on who is the human.
         
         Args:
             all_characters: List of all Character objects
+            game_history (str): The game history already formatted for the prompt,
+                when shared by several players (built here if omitted)
         
         Returns:
             str: Name of the character voted as human
         """
         try:
-            prompt = self._create_vote_prompt(all_characters)
-            response = self._call_openai_api(prompt)
-            
-            # Extract just the character name from the response
-            for character in all_characters:
-                if character.name.lower() in response.lower():
-                    self.character.set_vote(character.name)
-                    return character.name
-            
-            # If no clear match, use the first character mentioned
+            prompt = self._create_vote_prompt(all_characters, game_history)
+            # A vote is a deterministic function of the game history, so it is cached.
+            # The reply is constrained to a character name, so no extraction pass is needed.
+            response = self._call_openai_api_cached(
+                prompt, vote_response_format(["vote"], all_characters), VOTE_MAX_TOKENS, self.system_prompt
+            )
+            return self._set_vote_from_response(response, all_characters)
+        except Exception as e:
+            print(f"Error generating AI vote: {e}")
+            # Default to first character if there's an error
             self.character.set_vote(all_characters[0].name)
             return all_characters[0].name
+    
+    async def generate_vote_async(self, all_characters, game_history=None):
+        """Async variant of generate_vote."""
+        try:
+            prompt = self._create_vote_prompt(all_characters, game_history)
+            response = await self._call_openai_api_async_cached(
+                prompt, vote_response_format(["vote"], all_characters), VOTE_MAX_TOKENS, self.system_prompt
+            )
+            return self._set_vote_from_response(response, all_characters)
         except Exception as e:
             print(f"Error generating AI vote: {e}")
             # Default to first character if there's an error
             self.character.set_vote(all_characters[0].name)
             return all_characters[0].name
     
-    def _create_response_prompt(self, question, round_num):
-        """Create prompt for generating character responses."""
-        return f"""You are roleplaying as a character in a game. Respond to the question as this character would.
+    @classmethod
+    def generate_all(cls, ai_players, question, round_num, on_delta=None):
+        """
+        Generate every AI player's response to a question.
+        
+        All responses come from one batched request; if its reply is unusable,
+        the players are asked concurrently instead.
+        
+        Args:
+            ai_players: List of AIPlayer objects
+            question: Question object
+            round_num: Current round number
+            on_delta: Optional callback(character_name, delta); when given, the
+                players are asked concurrently and their responses are streamed
+                to it as they are generated, instead of waiting for one batched reply
+        
+        Returns:
+            list: Responses, in the same order as ai_players
+        """
+        if on_delta:
+            return run_concurrently(
+                ai_player.generate_response_async(
+                    question, round_num, functools.partial(on_delta, ai_player.character.name)
+                )
+                for ai_player in ai_players
+            )
+        
+        answers = cls.batch_round(
+            ai_players,
+            f"This is round {round_num} of the game.\n\nQuestion: {question.text}",
+            "provide each character's response (2-3 sentences) to the question, "
+            "reflecting their personality and speech style."
+        )
+        if answers is None:
+            return run_concurrently(
+                ai_player.generate_response_async(question, round_num) for ai_player in ai_players
+            )
+        
+        responses = [answers[ai_player.character.name] for ai_player in ai_players]
+        for ai_player, response in zip(ai_players, responses):
+            ai_player.character.add_response(response)
+        return responses
+    
+    @classmethod
+    def analyze_all(cls, ai_players, all_characters, question, round_num):
+        """
+        Get every AI player's analysis of a round, batched like generate_all.
+        
+        Returns:
+            list: Suspicion statements, in the same order as ai_players
+        """
+        # The round's responses are formatted once and shared by every prompt
+        responses_text = _format_round_responses(all_characters, round_num)
+        answers = cls.batch_round(
+            ai_players,
+            f"This is round {round_num} of the game.\nQuestion that was asked: {question.text}\n\n"
+            f"Here are all the responses:\n{responses_text}",
+            "for each character, express in 1-2 sentences, in their speech style, who they suspect "
+            "is the human player: name the response that breaks the pattern of the group and why.",
+            max_tokens_per_player=SHORT_REPLY_MAX_TOKENS
+        )
+        if answers is None:
+            return run_concurrently(
+                ai_player.analyze_responses_async(all_characters, question, round_num, responses_text)
+                for ai_player in ai_players
+            )
+        
+        suspicions = [answers[ai_player.character.name] for ai_player in ai_players]
+        for ai_player, suspicion in zip(ai_players, suspicions):
+            ai_player.character.add_suspicion(suspicion)
+        return suspicions
+    
+    @classmethod
+    def vote_all(cls, ai_players, all_characters):
+        """
+        Generate every AI player's final vote, batched like generate_all.
+        
+        Returns:
+            list: Voted character names, in the same order as ai_players
+        """
+        # The game history is formatted once and shared by every prompt
+        game_history = _format_game_history(all_characters)
+        answers = cls.batch_round(
+            ai_players,
+            f"Here is the complete game history:\n{game_history}",
+            "for each character, decide which character is the human player: the \"odd one out\" "
+            "whose response style, consistency, or uniqueness breaks the group's pattern. "
+            "Each answer must be just the name of the character they vote for.",
+            max_tokens_per_player=VOTE_MAX_TOKENS,
+            deterministic=True,
+            choices=all_characters
+        )
+        if answers is None:
+            return run_concurrently(
+                ai_player.generate_vote_async(all_characters, game_history) for ai_player in ai_players
+            )
+        
+        return [
+            ai_player._set_vote_from_response(answers[ai_player.character.name], all_characters)
+            for ai_player in ai_players
+        ]
+    
+    @classmethod
+    def batch_round(cls, ai_players, shared_prompt, task, max_tokens_per_player=RESPONSE_MAX_TOKENS,
+                    deterministic=False, choices=None):
+        """
+        Ask every AI player for their answer in a single request.
+        
+        The shared context is sent once instead of once per player, and the model
+        answers for each character in a JSON object keyed by character name.
+        
+        Args:
+            ai_players: List of AIPlayer objects
+            shared_prompt (str): Context shared by all players
+            task (str): What each character has to answer
+            max_tokens_per_player (int): Output token budget for each answer
+            deterministic (bool): Sample at temperature 0 and reuse cached replies
+            choices (list): Optional Character objects each answer is constrained to
+        
+        Returns:
+            dict: Answer per character name, or None if the reply could not be parsed
+        """
+        names = [ai_player.character.name for ai_player in ai_players]
+        characters_text = "\n\n".join(ai_player.character.get_prompt_description() for ai_player in ai_players)
+        
+        prompt = f"""You are roleplaying as each of these characters in turn, in a game where one player is human and the rest are AI.
 
-{self.character.get_prompt_description()}
+{characters_text}
 
-This is round {round_num} of the game.
+{shared_prompt}
 
-Question: {question.text}
+Task: {task}
+Answer independently for each character, staying true to their own personality and speech style.
+Reply with a JSON object with the keys {', '.join(names)}, whose values are each character's answer.
+"""
+        if choices:
+            response_format = vote_response_format(names, choices)
+        else:
+            response_format = {"type": "json_object"}
+        # Each answer also carries its JSON key and punctuation
+        max_tokens = (max_tokens_per_player + 8) * len(ai_players)
+        if deterministic:
+            response = ai_players[0]._call_openai_api_cached(prompt, response_format, max_tokens)
+        else:
+            response = ai_players[0]._call_openai_api(prompt, response_format, max_tokens)
+        
+        try:
+            answers = orjson.loads(response)
+        except ValueError:
+            return None
+        if not isinstance(answers, dict) or not all(isinstance(answers.get(name), str) for name in names):
+            return None
+        return {name: answers[name].strip() for name in names}
+    
+    def _set_vote_from_response(self, response, all_characters):
+        """Record and return the character name a vote response refers to."""
+        vote = parse_structured_vote(response, all_characters)
+        if vote:
+            self.character.set_vote(vote)
+            return vote
+        
+        # Otherwise take the first character name mentioned in the free-text response
+        pattern, name_by_lower = _name_matcher(tuple(character.name for character in all_characters))
+        match = pattern.search(response)
+        if match:
+            vote = name_by_lower[match.group(0).lower()]
+            self.character.set_vote(vote)
+            return vote
+        
+        # If no clear match, default to the first character
+        self.character.set_vote(all_characters[0].name)
+        return all_characters[0].name
+    
+    def _create_response_prompt(self, question, round_num):
+        """Create prompt for generating character responses."""
+        return f"""Round {round_num}. Question: {question.text}
 
-Provide a response (2-3 sentences) that reflects your character's personality and speech style.
+Task: answer in 2-3 sentences, in the character's personality and speech style.
 """
     
-    def _create_analysis_prompt(self, all_characters, question, round_num):
+    def _create_analysis_prompt(self, all_characters, question, round_num, responses_text=None):
         """Create prompt for analyzing responses."""
-        responses_text = ""
-        for char in all_characters:
-            if len(char.responses) >= round_num:
-                responses_text += f"{char.name}: \"{char.responses[round_num-1]}\"\n\n"
+        if responses_text is None:
+            responses_text = _format_round_responses(all_characters, round_num)
         
-        prompt = f"""You are roleplaying as a character in a game where one player is human and the rest are AI. 
-Your goal is to identify the human based on their responses.
-
-{self.character.get_prompt_description()}
+        return f"""Round {round_num}. Question: {question.text}
 
-This is round {round_num} of the game.
-Question that was asked: {question.text}
-
-Here are all the responses:
+Responses:
 {responses_text}
-
-As {self.character.name}, analyze the responses and identify which one seems different from the others.
-Look for patterns in how the AI characters respond, and identify which response breaks that pattern.
-Consider factors like response style, consistency with previous answers, and uniqueness compared to the group.
-
-Express your suspicions about who might be the human player in 1-2 sentences.
-Use your character's speech style. Name specifically who you are suspecting and why they stand out from the group.
+Task: as {self.character.name}, in 1-2 sentences and your speech style, name who you suspect is human ({PATTERN_CRITERIA}) and why.
 """
-        
-        print(f"\n=== STANDARD MODE SUSPICION PROMPT FOR {self.character.name} ===\n{prompt}\n===========\n")
-        
-        return prompt
     
-    def _create_vote_prompt(self, all_characters):
+    def _create_vote_prompt(self, all_characters, game_history=None):
         """Create prompt for final vote."""
-        game_history = ""
-        for round_num in range(len(self.character.responses)):
-            game_history += f"--- ROUND {round_num+1} ---\n"
-            for char in all_characters:
-                if round_num < len(char.responses):
-                    game_history += f"{char.name}'s response: \"{char.responses[round_num]}\"\n"
-            
-            game_history += "\nSuspicions after this round:\n"
-            for char in all_characters:
-                if round_num < len(char.suspicions):
-                    game_history += f"{char.name}: \"{char.suspicions[round_num]}\"\n"
-            game_history += "\n"
-        
-        return f"""You are roleplaying as a character in a game where one player is human and the rest are AI.
-Your goal is to identify the human based on their responses throughout the game.
-
-{self.character.get_prompt_description()}
-
-Here is the complete game history:
+        if game_history is None:
+            game_history = _format_game_history(all_characters, len(self.character.responses))
+        
+        return f"""Game history:
 {game_history}
-
-Analyze all responses and suspicions to identify which character is the "odd one out" from the group.
-Look for patterns that most characters follow and identify who breaks these patterns.
-Focus on identifying differences in response style, consistency, and uniqueness compared to the group.
-
-Based on your analysis of who stands out from the group, which character do you think is the human player?
-Respond with just the character's name that you're voting for.
+Task: vote for the human player, the "odd one out" ({PATTERN_CRITERIA}). Reply with the character's name only.
 """
     
-    def _call_openai_api(self, prompt):
-        """Call OpenAI API with the given prompt."""
+    def _call_openai_api(self, prompt, response_format=None, max_tokens=RESPONSE_MAX_TOKENS, system_prompt=None,
+                         temperature=0.7, model=PLAYER_MODEL):
+        """
+        Call OpenAI API with the given prompt.
+        
+        With a system_prompt, the prompt is sent as the user message after it;
+        otherwise the prompt itself is the system message.
+        """
         try:
-            response = openai.ChatCompletion.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": prompt},
-                ],
-                max_tokens=150,
-                temperature=0.7,
+            extra_args = {}
+            if response_format:
+                extra_args['response_format'] = response_format
+            response = chat_completion(
+                model=model,
+                messages=_build_messages(prompt, system_prompt),
+                max_tokens=max_tokens,
+                temperature=temperature,
+                **extra_args
             )
-            return response.choices[0].message.content.strip()
+            return response.strip()
         except Exception as e:
             print(f"OpenAI API error: {e}")
             # Return a fallback response if API fails
-            return f"I'm having trouble connecting to my knowledge base right now."
+            return API_ERROR_RESPONSE
+    
+    def _call_openai_api_cached(self, prompt, response_format=None, max_tokens=RESPONSE_MAX_TOKENS,
+                                system_prompt=None):
+        """Call OpenAI API at temperature 0, reusing the reply for a prompt seen before."""
+        cache_key = response_cache_key(PLAYER_MODEL, prompt, response_format, system_prompt or "")
+        cached = get_cached_response(cache_key)
+        if cached is not None:
+            return cached
+        
+        response = self._call_openai_api(prompt, response_format, max_tokens, system_prompt, temperature=0)
+        cache_response(cache_key, response)
+        return response
+    
+    async def _call_openai_api_async(self, prompt, response_format=None, max_tokens=RESPONSE_MAX_TOKENS,
+                                     system_prompt=None, temperature=0.7, model=PLAYER_MODEL, on_delta=None):
+        """
+        Call OpenAI API with the given prompt without blocking the event loop.
+        
+        With on_delta, the reply is streamed and each text delta is passed to it as it arrives.
+        """
+        try:
+            extra_args = {}
+            if response_format:
+                extra_args['response_format'] = response_format
+            request_args = dict(
+                model=model,
+                messages=_build_messages(prompt, system_prompt),
+                max_tokens=max_tokens,
+                temperature=temperature,
+                **extra_args
+            )
+            if on_delta:
+                response_text = await stream_chat_completion_async(on_delta, **request_args)
+                return response_text.strip()
+            response = await chat_completion_async(**request_args)
+            return response.strip()
+        except Exception as e:
+            print(f"OpenAI API error: {e}")
+            # Return a fallback response if API fails
+            return API_ERROR_RESPONSE
+    
+    async def _call_openai_api_async_cached(self, prompt, response_format=None, max_tokens=RESPONSE_MAX_TOKENS,
+                                            system_prompt=None):
+        """Async variant of _call_openai_api_cached."""
+        cache_key = response_cache_key(PLAYER_MODEL, prompt, response_format, system_prompt or "")
+        cached = get_cached_response(cache_key)
+        if cached is not None:
+            return cached
+        
+        response = await self._call_openai_api_async(
+            prompt, response_format, max_tokens, system_prompt, temperature=0
+        )
+        cache_response(cache_key, response)
+        return response
+
+
+def _build_messages(prompt, system_prompt=None):
+    """Build the chat messages for a prompt, with an optional system prompt ahead of it."""
+    if system_prompt:
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": prompt},
+        ]
+    return [{"role": "system", "content": prompt}]
+
+
+def _format_round_responses(all_characters, round_num):
+    """Format every character's response to a round as text for a prompt."""
+    return "".join(
+        f"{char.name}: \"{char.responses[round_num-1]}\"\n\n"
+        for char in all_characters if len(char.responses) >= round_num
+    )
+
+
+def _format_game_history(all_characters, num_rounds=None):
+    """
+    Format the responses and suspicions of each round as text for a prompt.
+    
+    The last HISTORY_VERBATIM_ROUNDS rounds are included verbatim; earlier
+    rounds keep only the first sentence of each response and suspicion, so the
+    history grows much more slowly over a game.
+    
+    Args:
+        all_characters: List of all Character objects
+        num_rounds (int): Number of rounds to include (default: every answered round)
+    """
+    if num_rounds is None:
+        num_rounds = max((len(char.responses) for char in all_characters), default=0)
+    
+    parts = []
+    for round_num in range(num_rounds):
+        brief = round_num < num_rounds - HISTORY_VERBATIM_ROUNDS
+        parts.append(f"--- ROUND {round_num+1} ---\n")
+        parts.extend(
+            f"{char.name}'s response: \"{history_text(char.responses[round_num], brief)}\"\n"
+            for char in all_characters if round_num < len(char.responses)
+        )
+        parts.append("\nSuspicions after this round:\n")
+        parts.extend(
+            f"{char.name}: \"{history_text(char.suspicions[round_num], brief)}\"\n"
+            for char in all_characters if round_num < len(char.suspicions)
+        )
+        parts.append("\n")
+    return "".join(parts)
+
+
+@functools.lru_cache(maxsize=1024)
+def first_sentence(text):
+    """
+    Return the first sentence of a text (the whole text if it has only one).
+    
+    None (an interrogation the human has not answered yet) gives an empty string.
+    """
+    text = (text or "").strip()
+    match = re.match(r".+?[.!?](?=\s|$)", text, re.DOTALL)
+    return match.group(0) if match else text
+
+
+def history_text(text, brief):
+    """
+    Text of a reply as quoted in a history prompt: only its first sentence if
+    brief, in full otherwise. A reply not given yet (None) is empty either way.
+    """
+    return first_sentence(text) if brief else (text or "")
+
+
+@functools.lru_cache(maxsize=32)
+def _name_matcher(names):
+    """
+    Build a case-insensitive regex matching any of the names, compiled once per set of characters.
+    
+    Returns:
+        tuple: The compiled pattern and a dict mapping each lowercased name to the name
+    """
+    pattern = re.compile("|".join(map(re.escape, names)), re.IGNORECASE)
+    return pattern, {name.lower(): name for name in names}
@@ -2,35 +2,185 @@
 Flask web application for the Reverse Turing Test game.
 """
 import os
-import json
+import logging
 import random
-from flask import Flask, render_template, request, jsonify, session
-from flask_socketio import SocketIO
+import secrets
+import contextvars
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial, wraps
+from itertools import chain
+import orjson
+from flask import Flask, Response, render_template, request, jsonify, session
+from flask.helpers import get_debug_flag
+from flask.json.provider import DefaultJSONProvider
+from flask_socketio import SocketIO, join_room
 from dotenv import load_dotenv
 from character import get_character_profiles
 from questions import get_question_bank, select_game_questions
-from ai_player import AIPlayer
+from ai_player import AIPlayer, HISTORY_VERBATIM_ROUNDS, SHORT_REPLY_MAX_TOKENS, VOTE_MAX_TOKENS, first_sentence, history_text
 from ai_judge import AIJudge
+from game_store import create_game_store
+from openai_client import run_concurrently
+
+logger = logging.getLogger(__name__)
 
 # Load environment variables
 load_dotenv()
 
+class OrjsonProvider(DefaultJSONProvider):
+    """JSON provider that encodes responses and decodes request bodies with orjson."""
+    
+    # Game states key some data by round number
+    OPTIONS = orjson.OPT_NON_STR_KEYS
+    
+    # Keys keep their insertion order and output is never indented (not even in
+    # debug mode), so no time is spent sorting keys or writing whitespace
+    sort_keys = False
+    compact = True
+    
+    def _dump_bytes(self, obj):
+        option = self.OPTIONS | (orjson.OPT_SORT_KEYS if self.sort_keys else 0)
+        if self.compact is False:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option)
+    
+    def dumps(self, obj, **kwargs):
+        return self._dump_bytes(obj).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        # Send orjson's bytes as they are rather than decoding them to a str first
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self._dump_bytes(obj), mimetype=self.mimetype)
+
 # Initialize Flask app
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 app.config['SECRET_KEY'] = os.urandom(24)
-socketio = SocketIO(app)
+# Socket.IO packets are encoded with the same orjson provider as HTTP responses
+socketio = SocketIO(app, json=app.json)
+
+# Worker threads for views that wait on OpenAI (see offload_blocking)
+BLOCKING_WORKER_THREADS = 32
+
+# Streamed AI text is emitted in batches of at least this many characters,
+# each batch STREAM_BATCH_GROWTH times larger than the one before
+STREAM_BATCH_CHARS = 50
+STREAM_BATCH_GROWTH = 3
+
+# gevent hub of the server, set for views running in a worker thread
+_server_hub = contextvars.ContextVar('server_hub', default=None)
+
+def offload_blocking(view):
+    """
+    Run a view that waits on OpenAI calls in a worker thread.
+    
+    Under the gevent server every request is a greenlet on one OS thread, and
+    the (unpatched) blocking OpenAI calls would stall every other game while
+    they wait. Running the view in gevent's thread pool lets the server keep
+    serving other requests; the request context is carried over to the thread.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if socketio.async_mode != 'gevent':
+            return view(*args, **kwargs)
+        import gevent
+        hub = gevent.get_hub()
+        threadpool = hub.threadpool
+        threadpool.maxsize = max(threadpool.maxsize, BLOCKING_WORKER_THREADS)
+        _server_hub.set(hub)
+        context = contextvars.copy_context()
+        return threadpool.apply(context.run, (view,) + args, kwargs)
+    return wrapper
+
+def emit_to_game(event, data, game_id):
+    """
+    Emit a Socket.IO event to the clients of a game.
+    
+    Safe to call from any thread: from a worker thread the emit is handed to
+    the server's gevent hub, which owns the Socket.IO connections.
+    """
+    hub = _server_hub.get()
+    if hub is None:
+        socketio.emit(event, data, to=game_id)
+    else:
+        import gevent
+        hub.loop.run_callback_threadsafe(partial(gevent.spawn, socketio.emit, event, data, to=game_id))
+
+class StreamBatcher:
+    """Collects a character's streamed text and emits it to the game's clients in growing batches."""
+    
+    def __init__(self, game_id, character_name, event='ai_token_batch'):
+        self.game_id = game_id
+        self.character_name = character_name
+        self.event = event
+        self.batch_size = STREAM_BATCH_CHARS
+        self.parts = []
+        self.length = 0
+    
+    def add(self, delta):
+        """Buffer a text delta, emitting the buffer once it reaches the batch size."""
+        self.parts.append(delta)
+        self.length += len(delta)
+        if self.length >= self.batch_size:
+            self.flush()
+            self.batch_size *= STREAM_BATCH_GROWTH
+    
+    def flush(self):
+        """Emit whatever text is buffered."""
+        if self.parts:
+            emit_to_game(self.event, {'name': self.character_name, 'tokens': ''.join(self.parts)}, self.game_id)
+            self.parts = []
+            self.length = 0
+
+# Background workers running votes for clients that wait for them on Socket.IO
+VOTE_WORKER_THREADS = 8
+vote_executor = ThreadPoolExecutor(max_workers=VOTE_WORKER_THREADS)
 
-# Game state
-game_states = {}
+# Game states, expired after a period without activity
+game_store = create_game_store()
+
+# Random bytes in a game ID (encoded as 12 URL-safe characters)
+GAME_ID_BYTES = 9
 
 # Game modes
 GAME_MODE_STANDARD = 'standard'
 GAME_MODE_INTERROGATION = 'interrogation'
 
+# The character profiles sent to every new game never change, so they are serialized once
+CHARACTER_PROFILES_JSON = orjson.dumps([
+    {
+        'name': char.name,
+        'profile': char.profile,
+        'personality': char.personality,
+        'background': char.background,
+        'speech_style': char.speech_style
+    }
+    for char in get_character_profiles()
+])
+
+# Seconds browsers may reuse the main page before requesting it again
+INDEX_MAX_AGE = 3600
+
+# The main page has no per-request content, so it is rendered once (see index)
+_index_html = None
+
 @app.route('/')
 def index():
     """Render the main page."""
-    return render_template('index.html')
+    global _index_html
+    if app.jinja_env.auto_reload:
+        # Templates may be edited while the server runs (debug mode), so render every time
+        return render_template('index.html')
+    if _index_html is None:
+        _index_html = render_template('index.html').encode()
+    response = app.response_class(_index_html, mimetype='text/html')
+    response.cache_control.public = True
+    response.cache_control.max_age = INDEX_MAX_AGE
+    return response
 
 @app.route('/api/start_game', methods=['POST'])
 def start_game():
@@ -38,8 +188,8 @@ def start_game():
     data = request.json
     game_mode = data.get('game_mode', GAME_MODE_STANDARD)
     
-    # Generate a unique game ID
-    game_id = str(random.randint(10000, 99999))
+    # Generate an unguessable game ID, unique without checking for collisions
+    game_id = secrets.token_urlsafe(GAME_ID_BYTES)
     
     # Initialize game state
     characters = get_character_profiles()
@@ -47,6 +197,7 @@ def start_game():
     # Create base game state
     game_state = {
         'characters': characters,
+        'chars_by_name': {char.name: char for char in characters},
         'current_round': 0,
         'human_character': None,
         'ai_players': [],
@@ -76,26 +227,20 @@ def start_game():
     elif game_mode == GAME_MODE_INTERROGATION:
         game_state['introductions'] = {}
         game_state['interrogations'] = {}
+        # Formatted interrogation history of each round, built once for all AI prompts
+        game_state['round_history_cache'] = {}
         game_state['num_rounds'] = 3  # Default to 3 rounds for interrogation mode
     
     # Store game state
-    game_states[game_id] = game_state
-    
-    # Return game information
-    return jsonify({
-        'game_id': game_id,
-        'game_mode': game_mode,
-        'characters': [
-            {
-                'name': char.name,
-                'profile': char.profile,
-                'personality': char.personality,
-                'background': char.background,
-                'speech_style': char.speech_style
-            }
-            for char in characters
-        ]
-    })
+    game_store.save(game_id, game_state)
+    
+    # Return game information, splicing in the pre-serialized character profiles
+    return app.response_class(
+        b'{"game_id":' + orjson.dumps(game_id)
+        + b',"game_mode":' + orjson.dumps(game_mode)
+        + b',"characters":' + CHARACTER_PROFILES_JSON + b'}',
+        mimetype='application/json'
+    )
 
 @app.route('/api/select_character', methods=['POST'])
 def select_character():
@@ -104,13 +249,13 @@ def select_character():
     game_id = data.get('game_id')
     character_index = data.get('character_index')
     
-    if not game_id or game_id not in game_states:
+    game_state = game_store.get(game_id) if game_id else None
+    if game_state is None:
         return jsonify({'error': 'Invalid game ID'}), 400
     
     if character_index is None or not isinstance(character_index, int):
         return jsonify({'error': 'Invalid character index'}), 400
     
-    game_state = game_states[game_id]
     characters = game_state['characters']
     
     if character_index < 0 or character_index >= len(characters):
@@ -120,10 +265,9 @@ def select_character():
     game_state['human_character'] = characters[character_index]
     
     # Create AI players for remaining characters
-    game_state['ai_players'] = []
-    for i, char in enumerate(characters):
-        if i != character_index:
-            game_state['ai_players'].append(AIPlayer(char))
+    ai_characters = characters[:character_index] + characters[character_index + 1:]
+    game_state['ai_players'] = [AIPlayer(char) for char in ai_characters]
+    game_state['ai_by_char_name'] = {ai.character.name: ai for ai in game_state['ai_players']}
     
     # Start first round
     game_state['current_round'] = 1
@@ -145,22 +289,24 @@ def select_character():
             'category': current_question.category
         }
     
+    game_store.save(game_id, game_state)
     return jsonify(response_data)
 
 @app.route('/api/submit_response', methods=['POST'])
+@offload_blocking
 def submit_response():
     """Submit the human player's response to a question."""
     data = request.json
     game_id = data.get('game_id')
     response = data.get('response')
     
-    if not game_id or game_id not in game_states:
+    game_state = game_store.get(game_id) if game_id else None
+    if game_state is None:
         return jsonify({'error': 'Invalid game ID'}), 400
     
     if not response:
         return jsonify({'error': 'Response cannot be empty'}), 400
     
-    game_state = game_states[game_id]
     current_round = game_state['current_round']
     
     if current_round < 1 or current_round > len(game_state['game_questions']):
@@ -170,10 +316,22 @@ def submit_response():
     human_character = game_state['human_character']
     human_character.add_response(response)
     
-    # Generate AI responses
+    # Generate AI responses, streamed to the game's clients as they are written
+    # when the client is listening on Socket.IO
     current_question = game_state['game_questions'][current_round - 1]
-    for ai_player in game_state['ai_players']:
-        ai_player.generate_response(current_question, current_round)
+    if data.get('stream'):
+        batchers = {
+            ai_player.character.name: StreamBatcher(game_id, ai_player.character.name)
+            for ai_player in game_state['ai_players']
+        }
+        AIPlayer.generate_all(
+            game_state['ai_players'], current_question, current_round,
+            on_delta=lambda name, delta: batchers[name].add(delta)
+        )
+        for batcher in batchers.values():
+            batcher.flush()
+    else:
+        AIPlayer.generate_all(game_state['ai_players'], current_question, current_round)
     
     # Collect all responses
     all_responses = []
@@ -184,25 +342,27 @@ def submit_response():
                 'response': character.responses[current_round - 1]
             })
     
+    game_store.save(game_id, game_state)
     return jsonify({
         'round': current_round,
         'responses': all_responses
     })
 
 @app.route('/api/submit_suspicion', methods=['POST'])
+@offload_blocking
 def submit_suspicion():
     """Submit the human player's suspicion."""
     data = request.json
     game_id = data.get('game_id')
     suspicion = data.get('suspicion')
     
-    if not game_id or game_id not in game_states:
+    game_state = game_store.get(game_id) if game_id else None
+    if game_state is None:
         return jsonify({'error': 'Invalid game ID'}), 400
     
     if not suspicion:
         return jsonify({'error': 'Suspicion cannot be empty'}), 400
     
-    game_state = game_states[game_id]
     current_round = game_state['current_round']
     
     if current_round < 1 or current_round > len(game_state['game_questions']):
@@ -222,13 +382,15 @@ def submit_suspicion():
     if current_round not in game_state['judge_suspicions']:
         game_state['judge_suspicions'][current_round] = []
     
-    for judge_data in game_state['ai_judges']:
+    # The judges analyze the round concurrently
+    suspicions = AIJudge.analyze_all(
+        [judge_data['object'] for judge_data in game_state['ai_judges']],
+        game_state['characters'],
+        current_question,
+        current_round
+    )
+    for judge_data, suspicion in zip(game_state['ai_judges'], suspicions):
         judge = judge_data['object']
-        suspicion = judge.analyze_responses(
-            game_state['characters'],
-            current_question,
-            current_round
-        )
         judge_suspicions.append({
             'judge_name': judge.name,
             'approach': judge_data['approach'],
@@ -264,6 +426,7 @@ def submit_suspicion():
             'category': next_question.category
         }
     
+    game_store.save(game_id, game_state)
     return jsonify({
         'round': current_round,
         'suspicions': all_suspicions,
@@ -274,38 +437,82 @@ def submit_suspicion():
     })
 
 @app.route('/api/submit_vote', methods=['POST'])
+@offload_blocking
 def submit_vote():
     """Submit the human player's vote."""
     data = request.json
     game_id = data.get('game_id')
     vote = data.get('vote')
     
-    if not game_id or game_id not in game_states:
+    game_state = game_store.get(game_id) if game_id else None
+    if game_state is None:
         return jsonify({'error': 'Invalid game ID'}), 400
     
     # In standard mode, we allow empty votes since the human player doesn't need to vote
-    if not vote and game_id in game_states and game_states[game_id]['game_mode'] != GAME_MODE_STANDARD:
+    if not vote and game_state['game_mode'] != GAME_MODE_STANDARD:
         return jsonify({'error': 'Vote cannot be empty'}), 400
     
-    game_state = game_states[game_id]
+    # Clients listening on Socket.IO get the result as a 'votes_ready' event
+    # instead of holding the request open through the judges' discussion
+    if data.get('background'):
+        game_state['vote_result'] = None
+        game_store.save(game_id, game_state)
+        vote_executor.submit(contextvars.copy_context().run, _finish_vote_in_background, game_id, game_state, vote)
+        return jsonify({'status': 'started', 'result_url': '/api/get_vote_result'}), 202
+    
+    result = _run_vote(game_state, vote)
+    game_store.save(game_id, game_state)
+    return jsonify(result)
+
+@app.route('/api/get_vote_result', methods=['POST'])
+def get_vote_result():
+    """Get the result of a vote running in the background."""
+    data = request.json
+    game_id = data.get('game_id')
+    
+    game_state = game_store.get(game_id) if game_id else None
+    if game_state is None or 'vote_result' not in game_state:
+        return jsonify({'error': 'Invalid game ID'}), 400
     
+    if game_state['vote_result'] is None:
+        return jsonify({'status': 'pending'}), 202
+    return jsonify(game_state['vote_result'])
+
+def _finish_vote_in_background(game_id, game_state, vote):
+    """Run a vote in a background worker, then store its result and notify the game's clients."""
+    try:
+        result = _run_vote(game_state, vote)
+    except Exception as e:
+        logger.exception("Error running vote for game %s", game_id)
+        result = {'error': f'Voting failed: {e}'}
+    game_state['vote_result'] = result
+    game_store.save(game_id, game_state)
+    emit_to_game('votes_ready', result, game_id)
+
+def _run_vote(game_state, vote):
+    """
+    Collect the final votes and decide the game.
+    
+    Returns:
+        dict: The vote result sent to the client
+    """
     # Different voting logic based on game mode
     if game_state['game_mode'] == GAME_MODE_STANDARD:
         # In standard mode, judges vote on who they think is the human
         human_character = game_state['human_character']
         
         # Generate initial votes from AI judges
-        judge_votes = {}
-        for judge in game_state['ai_judges']:
-            vote = judge['object'].generate_vote(game_state['characters'], game_state['game_questions'])
-            judge_votes[judge['name']] = vote
+        judge_votes = AIJudge.vote_all(
+            [judge['object'] for judge in game_state['ai_judges']],
+            game_state['characters'], game_state['game_questions']
+        )
         
         # Have judges discuss and try to reach consensus
         main_judge = game_state['ai_judges'][0]['object']  # Use the first judge to lead the discussion
         other_judges = [judge['object'] for judge in game_state['ai_judges'][1:]]
         
         final_verdict, discussion_history = main_judge.discuss(
-            other_judges, game_state['characters'], game_state['game_questions']
+            other_judges, game_state['characters'], game_state['game_questions'], initial_votes=judge_votes
         )
         
         # Get final votes after discussion
@@ -318,64 +525,55 @@ def submit_vote():
         game_state['final_judge_votes'] = final_judge_votes
         
         # Debug logging
-        print("\n=== DEBUG: JUDGE DISCUSSION DATA ===")
-        print(f"Discussion history length: {len(discussion_history)}")
-        for i, round_data in enumerate(discussion_history):
-            print(f"Round {i+1} messages: {len(round_data)}")
-            for msg in round_data:
-                print(f"  Judge {msg['judge']}: {msg['message']}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Judge discussion: %d rounds", len(discussion_history))
+            for i, round_data in enumerate(discussion_history):
+                for msg in round_data:
+                    logger.debug("Round %d, Judge %s: %s", i + 1, msg['judge'], msg['message'])
         
         # Determine if human won or lost
         human_won = (final_verdict != human_character.name)
         game_state['human_won'] = human_won
         game_state['game_over'] = True
         
-        return jsonify({
+        return {
             'initial_judge_votes': judge_votes,
             'judge_votes': final_judge_votes,
             'judge_discussion': discussion_history,
             'voted_character': final_verdict,
             'human_character': human_character.name,
             'human_won': human_won
-        })
+        }
     else:  # GAME_MODE_INTERROGATION
         # Original voting logic for interrogation mode
         # Save human vote
         human_character = game_state['human_character']
         human_character.set_vote(vote)
         
-        # Generate AI votes
-        for ai_player in game_state['ai_players']:
-            ai_player.generate_vote(game_state['characters'])
+        # Generate AI votes (concurrently)
+        AIPlayer.vote_all(game_state['ai_players'], game_state['characters'])
         
         # Collect all votes
-        all_votes = {}
+        all_votes = defaultdict(list)
         for character in game_state['characters']:
             if character.vote:
-                if character.vote not in all_votes:
-                    all_votes[character.vote] = []
                 all_votes[character.vote].append(character.name)
         
-        # Determine the character with the most votes
-        most_votes = 0
-        voted_character = None
-        
-        for name, voters in all_votes.items():
-            if len(voters) > most_votes:
-                most_votes = len(voters)
-                voted_character = name
+        # Determine the character with the most votes (ties go to the first one voted for)
+        vote_counts = Counter({name: len(voters) for name, voters in all_votes.items()})
+        voted_character = vote_counts.most_common(1)[0][0] if vote_counts else None
         
         # Determine if human won or lost
         human_won = (voted_character != human_character.name)
         game_state['human_won'] = human_won
         game_state['game_over'] = True
         
-        return jsonify({
-            'votes': {name: voters for name, voters in all_votes.items()},
+        return {
+            'votes': dict(all_votes),
             'voted_character': voted_character,
             'human_character': human_character.name,
             'human_won': human_won
-        })
+        }
 
 @app.route('/api/reset_game', methods=['POST'])
 def reset_game():
@@ -383,29 +581,29 @@ def reset_game():
     data = request.json
     game_id = data.get('game_id')
     
-    if game_id and game_id in game_states:
+    if game_id:
         # Remove the game state
-        del game_states[game_id]
+        game_store.delete(game_id)
     
     return jsonify({'success': True})
 
 # Interrogation Mode API Endpoints
 
 @app.route('/api/submit_introduction', methods=['POST'])
+@offload_blocking
 def submit_introduction():
     """Submit the human player's introduction."""
     data = request.json
     game_id = data.get('game_id')
     introduction = data.get('introduction')
     
-    if not game_id or game_id not in game_states:
+    game_state = game_store.get(game_id) if game_id else None
+    if game_state is None:
         return jsonify({'error': 'Invalid game ID'}), 400
     
     if not introduction:
         return jsonify({'error': 'Introduction cannot be empty'}), 400
     
-    game_state = game_states[game_id]
-    
     if game_state['game_mode'] != GAME_MODE_INTERROGATION:
         return jsonify({'error': 'Not in interrogation mode'}), 400
     
@@ -414,21 +612,13 @@ def submit_introduction():
     human_character.introduction = introduction
     game_state['introductions'][human_character.name] = introduction
     
-    # Generate AI introductions
-    for ai_player in game_state['ai_players']:
-        # Generate introduction
-        prompt = f"""
-        You are roleplaying as {ai_player.character.name} in a game.
-        
-        {ai_player.character.get_prompt_description()}
-        
-        Introduce yourself to the group in 1-2 sentences. Stay true to your character's personality and speech style.
-        Don't reveal that you're an AI - just introduce yourself naturally as your character would.
-        """
-        
-        introduction = ai_player._call_openai_api(prompt)
-        ai_player.character.introduction = introduction
-        game_state['introductions'][ai_player.character.name] = introduction
+    # Generate AI introductions (the AI players introduce themselves concurrently)
+    ai_introductions = run_concurrently(
+        _generate_ai_introduction_async(ai_player) for ai_player in game_state['ai_players']
+    )
+    for ai_player, ai_introduction in zip(game_state['ai_players'], ai_introductions):
+        ai_player.character.introduction = ai_introduction
+        game_state['introductions'][ai_player.character.name] = ai_introduction
     
     # Collect all introductions
     all_introductions = []
@@ -439,6 +629,7 @@ def submit_introduction():
                 'introduction': game_state['introductions'][character.name]
             })
     
+    game_store.save(game_id, game_state)
     return jsonify({
         'introductions': all_introductions
     })
@@ -449,11 +640,10 @@ def start_interrogation_round():
     data = request.json
     game_id = data.get('game_id')
     
-    if not game_id or game_id not in game_states:
+    game_state = game_store.get(game_id) if game_id else None
+    if game_state is None:
         return jsonify({'error': 'Invalid game ID'}), 400
     
-    game_state = game_states[game_id]
-    
     if game_state['game_mode'] != GAME_MODE_INTERROGATION:
         return jsonify({'error': 'Not in interrogation mode'}), 400
     
@@ -478,6 +668,8 @@ def start_interrogation_round():
     if current_round not in game_state['interrogations']:
         game_state['interrogations'][current_round] = []
     
+    game_store.save(game_id, game_state)
+    
     # Return round information
     return jsonify({
         'round': current_round,
@@ -488,24 +680,26 @@ def start_interrogation_round():
     })
 
 @app.route('/api/get_interrogation_turn', methods=['POST'])
+@offload_blocking
 def get_interrogation_turn():
     """Get the next interrogation turn in the current round."""
     data = request.json
     game_id = data.get('game_id')
     
-    if not game_id or game_id not in game_states:
+    game_state = game_store.get(game_id) if game_id else None
+    if game_state is None:
         return jsonify({'error': 'Invalid game ID'}), 400
     
-    game_state = game_states[game_id]
-    
     if game_state['game_mode'] != GAME_MODE_INTERROGATION:
         return jsonify({'error': 'Not in interrogation mode'}), 400
     
+    # Entries used throughout the turn, looked up once
     current_round = game_state['current_round']
+    characters = game_state['characters']
     round_interrogations = game_state['interrogations'].get(current_round, [])
     
     # Check if all interrogations for this round are complete
-    if len(round_interrogations) >= len(game_state['characters']):
+    if len(round_interrogations) >= len(characters):
         return jsonify({
             'round_complete': True,
             'round': current_round
@@ -513,10 +707,10 @@ def get_interrogation_turn():
     
     # Get the next interrogator
     interrogator_idx = game_state['interrogation_order'][len(round_interrogations)]
-    interrogator = game_state['characters'][interrogator_idx]
+    interrogator = characters[interrogator_idx]
     
     # Get available targets (all characters except the interrogator)
-    available_targets = [char.name for char in game_state['characters'] 
+    available_targets = [char.name for char in characters 
                        if char.name != interrogator.name]
     
     # If this is the human's turn to interrogate
@@ -528,16 +722,14 @@ def get_interrogation_turn():
     
     if not is_human_turn and available_targets:
         # Find the AI player
-        ai_player = next(ai for ai in game_state['ai_players'] 
-                       if ai.character == interrogator)
+        ai_player = game_state['ai_by_char_name'][interrogator.name]
         
         # Choose target
         target_name = _choose_ai_interrogation_target(ai_player, available_targets, game_state)
         ai_target = target_name
         
         # Generate question
-        target_character = next(char for char in game_state['characters'] 
-                             if char.name == target_name)
+        target_character = game_state['chars_by_name'][target_name]
         ai_question = _generate_ai_question(ai_player, target_character, current_round, game_state)
     
     return jsonify({
@@ -551,6 +743,7 @@ def get_interrogation_turn():
     })
 
 @app.route('/api/submit_interrogation', methods=['POST'])
+@offload_blocking
 def submit_interrogation():
     """Submit an interrogation (question and target)."""
     data = request.json
@@ -558,18 +751,19 @@ def submit_interrogation():
     target_name = data.get('target')
     question = data.get('question')
     
-    if not game_id or game_id not in game_states:
+    game_state = game_store.get(game_id) if game_id else None
+    if game_state is None:
         return jsonify({'error': 'Invalid game ID'}), 400
     
     if not target_name or not question:
         return jsonify({'error': 'Target and question are required'}), 400
     
-    game_state = game_states[game_id]
-    
     if game_state['game_mode'] != GAME_MODE_INTERROGATION:
         return jsonify({'error': 'Not in interrogation mode'}), 400
     
+    # Entries used throughout the interrogation, looked up once
     current_round = game_state['current_round']
+    human_character = game_state['human_character']
     round_interrogations = game_state['interrogations'].get(current_round, [])
     
     # Get the current interrogator
@@ -577,8 +771,7 @@ def submit_interrogation():
     interrogator = game_state['characters'][interrogator_idx]
     
     # Find target character
-    target_character = next((char for char in game_state['characters'] 
-                          if char.name == target_name), None)
+    target_character = game_state['chars_by_name'].get(target_name)
     
     if not target_character:
         return jsonify({'error': 'Invalid target'}), 400
@@ -587,10 +780,9 @@ def submit_interrogation():
     # If target is AI, generate response now
     response = None
     
-    if target_character != game_state['human_character']:
+    if target_character != human_character:
         # Find AI player
-        ai_target = next(ai for ai in game_state['ai_players'] 
-                       if ai.character == target_character)
+        ai_target = game_state['ai_by_char_name'][target_name]
         
         # Generate response
         response = _generate_ai_response(ai_target, question, interrogator, game_state)
@@ -604,10 +796,12 @@ def submit_interrogation():
     }
     
     game_state['interrogations'][current_round].append(interrogation_data)
+    game_state['round_history_cache'].pop(current_round, None)
     
+    game_store.save(game_id, game_state)
     return jsonify({
         'interrogation': interrogation_data,
-        'is_human_target': target_character == game_state['human_character']
+        'is_human_target': target_character == human_character
     })
 
 @app.route('/api/submit_interrogation_response', methods=['POST'])
@@ -617,14 +811,13 @@ def submit_interrogation_response():
     game_id = data.get('game_id')
     response = data.get('response')
     
-    if not game_id or game_id not in game_states:
+    game_state = game_store.get(game_id) if game_id else None
+    if game_state is None:
         return jsonify({'error': 'Invalid game ID'}), 400
     
     if not response:
         return jsonify({'error': 'Response cannot be empty'}), 400
     
-    game_state = game_states[game_id]
-    
     if game_state['game_mode'] != GAME_MODE_INTERROGATION:
         return jsonify({'error': 'Not in interrogation mode'}), 400
     
@@ -635,27 +828,29 @@ def submit_interrogation_response():
     for interrogation in reversed(round_interrogations):
         if interrogation['target'] == game_state['human_character'].name and not interrogation['response']:
             interrogation['response'] = response
+            game_state['round_history_cache'].pop(current_round, None)
             break
     
+    game_store.save(game_id, game_state)
     return jsonify({
         'success': True
     })
 
 @app.route('/api/submit_interrogation_suspicion', methods=['POST'])
+@offload_blocking
 def submit_interrogation_suspicion():
     """Submit suspicions after an interrogation round."""
     data = request.json
     game_id = data.get('game_id')
     suspicion = data.get('suspicion')
     
-    if not game_id or game_id not in game_states:
+    game_state = game_store.get(game_id) if game_id else None
+    if game_state is None:
         return jsonify({'error': 'Invalid game ID'}), 400
     
     if not suspicion:
         return jsonify({'error': 'Suspicion cannot be empty'}), 400
     
-    game_state = game_states[game_id]
-    
     if game_state['game_mode'] != GAME_MODE_INTERROGATION:
         return jsonify({'error': 'Not in interrogation mode'}), 400
     
@@ -665,10 +860,25 @@ def submit_interrogation_suspicion():
     human_character = game_state['human_character']
     human_character.add_suspicion(suspicion)
     
-    # Generate AI suspicions
-    for ai_player in game_state['ai_players']:
-        # Generate suspicion based on interrogations
-        ai_suspicion = _generate_ai_suspicion(ai_player, current_round, game_state)
+    # Generate AI suspicions based on interrogations (the AI players think concurrently),
+    # streamed to the game's clients as they are written when the client is listening on Socket.IO
+    round_history = _round_history(game_state, current_round)
+    batchers = {}
+    if data.get('stream'):
+        batchers = {
+            ai_player.character.name: StreamBatcher(game_id, ai_player.character.name, 'ai_suspicion_batch')
+            for ai_player in game_state['ai_players']
+        }
+    ai_suspicions = run_concurrently(
+        _generate_ai_suspicion_async(
+            ai_player, current_round, round_history,
+            batchers[ai_player.character.name].add if batchers else None
+        )
+        for ai_player in game_state['ai_players']
+    )
+    for batcher in batchers.values():
+        batcher.flush()
+    for ai_player, ai_suspicion in zip(game_state['ai_players'], ai_suspicions):
         ai_player.character.add_suspicion(ai_suspicion)
     
     # Collect all suspicions
@@ -688,6 +898,7 @@ def submit_interrogation_suspicion():
     if next_round > game_state['num_rounds']:
         next_action = 'voting'
     
+    game_store.save(game_id, game_state)
     return jsonify({
         'round': current_round,
         'suspicions': all_suspicions,
@@ -697,35 +908,81 @@ def submit_interrogation_suspicion():
 
 # Helper functions for interrogation mode
 
+def _round_history(game_state, round_num, brief=False):
+    """
+    Get the formatted interrogations of a round.
+    
+    The text is built once and kept in game_state['round_history_cache'] until
+    the round's interrogations change, so the AI prompts of a round share it.
+    
+    Args:
+        brief (bool): Keep only the first sentence of each response,
+            for rounds older than the last HISTORY_VERBATIM_ROUNDS
+    """
+    cache = game_state['round_history_cache'].setdefault(round_num, {})
+    history = cache.get(brief)
+    if history is None:
+        history = "".join(
+            f"{data['interrogator']} asked {data['target']}: \"{data['question']}\"\n"
+            f"{data['target']} responded: \"{history_text(data['response'], brief)}\"\n\n"
+            for data in game_state['interrogations'].get(round_num, [])
+        )
+        cache[brief] = history
+    return history
+
+def _is_brief_round(round_num, current_round):
+    """Whether a past round is old enough to be sent in brief (see HISTORY_VERBATIM_ROUNDS)."""
+    return round_num < current_round - HISTORY_VERBATIM_ROUNDS
+
+async def _generate_ai_introduction_async(ai_player):
+    """Generate an AI player's introduction, so several players can be awaited together."""
+    prompt = f"""
+    You are roleplaying as {ai_player.character.name} in a game.
+    
+    {ai_player.character.get_prompt_description()}
+    
+    Introduce yourself to the group in 1-2 sentences. Stay true to your character's personality and speech style.
+    Don't reveal that you're an AI - just introduce yourself naturally as your character would.
+    """
+    
+    return await ai_player._call_openai_api_async(prompt, max_tokens=SHORT_REPLY_MAX_TOKENS)
+
 def _choose_ai_interrogation_target(ai_player, available_targets, game_state):
     """Choose which character an AI should interrogate."""
     # If only one target available, choose it
     if len(available_targets) == 1:
         return available_targets[0]
     
-    # Build history with introductions and previous interrogations
+    # Before any interrogation or suspicion there is nothing to tell the targets apart,
+    # so the first round's targets are chosen randomly (as in the terminal game)
     current_round = game_state['current_round']
-    history = "--- CHARACTER INTRODUCTIONS ---\n"
-    if 'introductions' in game_state:
-        for char_name, intro in game_state['introductions'].items():
-            history += f"{char_name} introduced themselves: \"{intro}\"\n\n"
+    if current_round == 1:
+        return random.choice(available_targets)
+    
+    # Build history with introductions and previous interrogations
+    parts = ["--- CHARACTER INTRODUCTIONS ---\n"]
+    for char_name, intro in game_state.get('introductions', {}).items():
+        parts.append(f"{char_name} introduced themselves: \"{intro}\"\n\n")
     
-    # Add previous interrogations to history
+    # Add previous interrogations to history; the suspicions below summarize the
+    # older rounds, so those are sent in brief
     for r in range(1, current_round):
         if r in game_state['interrogations']:
-            history += f"--- ROUND {r} INTERROGATIONS ---\n"
-            for data in game_state['interrogations'][r]:
-                history += f"{data['interrogator']} asked {data['target']}: \"{data['question']}\"\n"
-                history += f"{data['target']} responded: \"{data['response']}\"\n\n"
+            parts.append(f"--- ROUND {r} INTERROGATIONS ---\n")
+            parts.append(_round_history(game_state, r, _is_brief_round(r, current_round)))
+    history = "".join(parts)
     
     # Build suspicion history
-    suspicion_history = ""
+    parts = []
     for char in game_state['characters']:
         if char.suspicions:
-            suspicion_history += f"{char.name}'s suspicions:\n"
-            for r, suspicion in enumerate(char.suspicions):
-                suspicion_history += f"After round {r+1}: \"{suspicion}\"\n"
-            suspicion_history += "\n"
+            parts.append(f"{char.name}'s suspicions:\n")
+            for r, suspicion in enumerate(char.suspicions, 1):
+                if _is_brief_round(r, current_round):
+                    suspicion = first_sentence(suspicion)
+                parts.append(f"After round {r}: \"{suspicion}\"\n")
+            parts.append("\n")
+    suspicion_history = "".join(parts)
     
     # Create the prompt
     prompt = f"""
@@ -752,7 +1009,8 @@ def _choose_ai_interrogation_target(ai_player, available_targets, game_state):
     Respond with ONLY the character's name.
     """
     
-    response = ai_player._call_openai_api(prompt)
+    # The choice is a deterministic function of the game so far, so it is cached
+    response = ai_player._call_openai_api_cached(prompt, max_tokens=VOTE_MAX_TOKENS)
     
     # Extract the character name from the response
     for target in available_targets:
@@ -764,14 +1022,17 @@ def _choose_ai_interrogation_target(ai_player, available_targets, game_state):
 
 def _generate_ai_question(ai_player, target_character, round_num, game_state):
     """Generate a targeted question for another character."""
-    # Build history of previous interactions with this target
-    history = ""
+    # Build history of previous interactions with this target, older rounds in brief
+    parts = []
     for r in range(1, round_num):
-        if r in game_state['interrogations']:
-            for data in game_state['interrogations'][r]:
-                if data['target'] == target_character.name:
-                    history += f"In round {r}, {data['interrogator']} asked: \"{data['question']}\"\n"
-                    history += f"{target_character.name} responded: \"{data['response']}\"\n\n"
+        brief = _is_brief_round(r, round_num)
+        parts.extend(
+            f"In round {r}, {data['interrogator']} asked: \"{data['question']}\"\n"
+            f"{target_character.name} responded: \"{history_text(data['response'], brief)}\"\n\n"
+            for data in game_state['interrogations'].get(r, [])
+            if data['target'] == target_character.name
+        )
+    history = "".join(parts)
     
     # Create the prompt
     prompt = f"""
@@ -790,7 +1051,7 @@ def _generate_ai_question(ai_player, target_character, round_num, game_state):
     Make your question clever and designed to reveal if they break the pattern of the AI group.
     """
     
-    return ai_player._call_openai_api(prompt)
+    return ai_player._call_openai_api(prompt, max_tokens=SHORT_REPLY_MAX_TOKENS)
 
 def _generate_ai_response(ai_player, question, questioner, game_state):
     """Generate a response to an interrogation question."""
@@ -805,17 +1066,16 @@ def _generate_ai_response(ai_player, question, questioner, game_state):
     Respond to this question in 1-2 sentences.
     """
     
-    return ai_player._call_openai_api(prompt)
+    return ai_player._call_openai_api(prompt, max_tokens=SHORT_REPLY_MAX_TOKENS)
 
-def _generate_ai_suspicion(ai_player, round_num, game_state):
-    """Generate suspicions based on interrogations."""
-    # Build history of all interrogations in this round
-    round_history = ""
-    if round_num in game_state['interrogations']:
-        for data in game_state['interrogations'][round_num]:
-            round_history += f"{data['interrogator']} asked {data['target']}: \"{data['question']}\"\n"
-            round_history += f"{data['target']} responded: \"{data['response']}\"\n\n"
+async def _generate_ai_suspicion_async(ai_player, round_num, round_history, on_delta=None):
+    """
+    Generate suspicions based on interrogations, so several players can be awaited together.
     
+    Args:
+        round_history: The round's formatted interrogations, from _round_history
+        on_delta: Optional callback(delta) the suspicion is streamed to as it is written
+    """
     # Create the prompt
     prompt = f"""
     You are roleplaying as {ai_player.character.name} in a game where one player is human and the rest are AI.
@@ -834,72 +1094,161 @@ def _generate_ai_suspicion(ai_player, round_num, game_state):
         Express your suspicions about who might be the human player in 1-2 sentences.
         Use your character's speech style. Name specifically who you are suspecting and why they stand out from the group.
     """
-    print(prompt)
-    return ai_player._call_openai_api(prompt)
+    return await ai_player._call_openai_api_async(prompt, max_tokens=SHORT_REPLY_MAX_TOKENS, on_delta=on_delta)
 
-@app.route('/api/get_conversation_history', methods=['POST'])
-def get_conversation_history():
-    """Get the full conversation history for a game."""
-    data = request.json
-    game_id = data.get('game_id')
-    
-    if not game_id or game_id not in game_states:
-        return jsonify({'error': 'Invalid game ID'}), 400
-    
-    game_state = game_states[game_id]
-    
-    # Initialize conversation history
-    conversation_history = []
+def _iter_conversation_history(game_state, since_round=-1):
+    """
+    Yield the entries of a game's conversation history in display order:
+    introductions, then the interrogations of each round, then the suspicions.
     
+    Args:
+        game_state (dict): The game
+        since_round (int): Only yield the entries of later rounds; the default
+            of -1 includes the introductions (round 0)
+    """
     # Add introductions
-    if 'introductions' in game_state:
-        for char_name, intro in game_state['introductions'].items():
-            conversation_history.append({
-                'type': 'introduction',
-                'character': char_name,
-                'content': intro,
-                'round': 0,
-                'timestamp': None  # We could add timestamps if needed
-            })
+    for char_name, intro in (game_state.get('introductions', {}).items() if since_round < 0 else ()):
+        yield {
+            'type': 'introduction',
+            'character': char_name,
+            'content': intro,
+            'round': 0,
+            'timestamp': None  # We could add timestamps if needed
+        }
     
-    # Add all interrogations from all rounds
-    for round_num in sorted(game_state.get('interrogations', {}).keys()):
-        for idx, interrogation in enumerate(game_state['interrogations'][round_num]):
-            # Add the question
-            conversation_history.append({
+    # Add all interrogations from all rounds, each question followed by its response if it exists.
+    # start_interrogation_round adds the rounds in increasing order, so no sort is needed.
+    for round_num, round_interrogations in game_state.get('interrogations', {}).items():
+        if round_num <= since_round:
+            continue
+        for idx, interrogation in enumerate(round_interrogations):
+            # Read each field once
+            interrogator, target, question, response = (
+                interrogation['interrogator'], interrogation['target'],
+                interrogation['question'], interrogation['response']
+            )
+            yield {
                 'type': 'question',
-                'character': interrogation['interrogator'],
-                'target': interrogation['target'],
-                'content': interrogation['question'],
+                'character': interrogator,
+                'target': target,
+                'content': question,
                 'round': round_num,
                 'sequence': idx
-            })
-            
-            # Add the response if it exists
-            if interrogation['response']:
-                conversation_history.append({
+            }
+            if response:
+                yield {
                     'type': 'response',
-                    'character': interrogation['target'],
-                    'to': interrogation['interrogator'],
-                    'content': interrogation['response'],
+                    'character': target,
+                    'to': interrogator,
+                    'content': response,
                     'round': round_num,
                     'sequence': idx
-                })
+                }
     
-    # Add suspicions
-    for round_num in range(1, game_state.get('current_round', 0) + 1):
-        for character in game_state['characters']:
-            if character.suspicions and len(character.suspicions) >= round_num:
-                conversation_history.append({
-                    'type': 'suspicion',
-                    'character': character.name,
-                    'content': character.suspicions[round_num - 1],
-                    'round': round_num
-                })
+    # Add suspicions, grouped by round. Each character's suspicions are in round
+    # order, so one pass over each list fills the rounds.
+    first_round = max(since_round, 0)
+    max_round = game_state.get('current_round', 0)
+    suspicions_by_round = [[] for _ in range(first_round, max_round)]
+    for character in game_state['characters']:
+        name = character.name
+        for round_idx, suspicion in enumerate(character.suspicions[first_round:max_round]):
+            suspicions_by_round[round_idx].append({
+                'type': 'suspicion',
+                'character': name,
+                'content': suspicion,
+                'round': first_round + round_idx + 1
+            })
+    yield from chain.from_iterable(suspicions_by_round)
+
+def _conversation_history_etag(game_id, game_state, since_round):
+    """
+    ETag of the conversation history returned for since_round.
     
-    return jsonify({
-        'conversation_history': conversation_history
+    Entries are only ever added (a response fills in its question's entry pair
+    once), so counting them identifies the version without building them.
+    """
+    max_round = game_state.get('current_round', 0)
+    entry_count = len(game_state.get('introductions', {})) if since_round < 0 else 0
+    for round_num, round_interrogations in game_state.get('interrogations', {}).items():
+        if round_num > since_round:
+            entry_count += sum(2 if interrogation['response'] else 1 for interrogation in round_interrogations)
+    first_round = max(since_round, 0)
+    entry_count += sum(max(min(len(character.suspicions), max_round) - first_round, 0)
+                       for character in game_state['characters'])
+    return f'{game_id}-{since_round}-{max_round}-{entry_count}'
+
+def _read_conversation_history_request():
+    """
+    Read a conversation history request: its game, optional since_round, and ETag.
+    
+    Returns:
+        tuple: (game_state, since_round, etag, None), or (None, None, None, response)
+            when the request is invalid or the client's copy is current (304)
+    """
+    data = request.json
+    game_id = data.get('game_id')
+    since_round = data.get('since_round', -1)
+    
+    game_state = game_store.get(game_id) if game_id else None
+    if game_state is None:
+        return None, None, None, (jsonify({'error': 'Invalid game ID'}), 400)
+    
+    if not isinstance(since_round, int):
+        return None, None, None, (jsonify({'error': 'since_round must be a round number'}), 400)
+    
+    etag = _conversation_history_etag(game_id, game_state, since_round)
+    if request.if_none_match.contains(etag):
+        not_modified = app.response_class(status=304)
+        not_modified.set_etag(etag)
+        return None, None, None, not_modified
+    
+    return game_state, since_round, etag, None
+
+@app.route('/api/get_conversation_history', methods=['POST'])
+def get_conversation_history():
+    """
+    Get the conversation history for a game: all of it, or only the rounds
+    after since_round. Answers 304 when If-None-Match has the current ETag.
+    """
+    game_state, since_round, etag, early_response = _read_conversation_history_request()
+    if early_response is not None:
+        return early_response
+    
+    response = jsonify({
+        'conversation_history': list(_iter_conversation_history(game_state, since_round))
     })
+    response.set_etag(etag)
+    return response
+
+@app.route('/api/stream_conversation_history', methods=['POST'])
+def stream_conversation_history():
+    """
+    Stream the conversation history of a game as newline-delimited JSON, one
+    entry per line, so the client can show the first entries while the rest
+    are still being written. Takes the same since_round and ETag as
+    get_conversation_history.
+    """
+    game_state, since_round, etag, early_response = _read_conversation_history_request()
+    if early_response is not None:
+        return early_response
+    
+    # The body is written after the view returns, while other requests may be
+    # changing the game, so it streams a snapshot taken along with the ETag
+    entries = list(_iter_conversation_history(game_state, since_round))
+    dump = app.json._dump_bytes
+    response = Response((dump(entry) + b'\n' for entry in entries), mimetype='application/x-ndjson')
+    response.set_etag(etag)
+    return response
+
+@socketio.on('join_game')
+def join_game(data):
+    """Subscribe a Socket.IO client to a game's streamed AI text."""
+    game_id = data.get('game_id') if isinstance(data, dict) else None
+    if game_id:
+        join_room(game_id)
 
 if __name__ == '__main__':
-    socketio.run(app, debug=True, host='0.0.0.0', port=5000)
+    logging.basicConfig(level=logging.INFO)
+    # Debug mode (reloader, debugger) only when asked for, as with flask run
+    socketio.run(app, debug=get_debug_flag(), host='0.0.0.0', port=5000)
@@ -1,6 +1,7 @@
 """
 Asset management for the Reverse Turing Test game.
 """
+import functools
 import os
 import pygame
 
@@ -31,9 +32,63 @@ HEADING_SIZE = 24
 TEXT_SIZE = 18
 SMALL_SIZE = 14
 
+# Spacing of the background grid
+GRID_SIZE = 50
+
+# Avatar sizes: on character cards, and scaled down in message bubbles
+AVATAR_SIZE = 60
+BUBBLE_AVATAR_SIZE = 40
+
+@functools.lru_cache(maxsize=1024)
+def wrap_lines(text, font, max_width):
+    """
+    Word-wrap text to a maximum width.
+    
+    Messages are redrawn every frame, so the lines are cached per (text, font, width).
+    
+    Args:
+        text (str): Text to wrap
+        font: Pygame font object
+        max_width (int): Maximum width for wrapping
+    
+    Returns:
+        tuple: The lines of text
+    """
+    words = text.split(' ')
+    lines = []
+    current_line = []
+    
+    for word in words:
+        # Test width with current word added
+        test_line = ' '.join(current_line + [word])
+        test_width = font.size(test_line)[0]
+        
+        if test_width <= max_width:
+            current_line.append(word)
+        else:
+            # Start a new line if current line has content
+            if current_line:
+                lines.append(' '.join(current_line))
+                current_line = [word]
+            else:
+                # If a single word is too long, force it on its own line
+                lines.append(word)
+                current_line = []
+    
+    # Add the last line
+    if current_line:
+        lines.append(' '.join(current_line))
+    
+    return tuple(lines)
+
 class Assets:
     """Asset manager for the game."""
     
+    # (avatars, bubble avatars) by character name, rendered once and shared by every instance
+    _avatar_cache = None
+    # Background surface, likewise rendered once
+    _background_cache = None
+    
     def __init__(self):
         """Initialize assets."""
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
@@ -46,14 +101,25 @@ class Assets:
         self.small_font = pygame.font.SysFont("Arial", SMALL_SIZE)
         
         # Create character avatars (colored circles with initials)
-        self.avatars = self._create_avatars()
+        self.avatars, self.bubble_avatars = self._create_avatars()
         
         # Load or create background
         self.background = self._create_background()
     
     def _create_avatars(self):
-        """Create avatar images for characters."""
+        """
+        Create avatar images for characters, at card size and at message bubble size.
+        
+        The images never change, so they are rendered once and shared by every instance.
+        
+        Returns:
+            tuple: (avatars, bubble avatars), each a dict of surfaces by character name
+        """
+        if Assets._avatar_cache is not None:
+            return Assets._avatar_cache
+        
         avatars = {}
+        bubble_avatars = {}
         colors = [BLUE, GREEN, RED, YELLOW, PURPLE]
         
         from character import get_character_profiles
@@ -61,39 +127,45 @@ class Assets:
         
         for i, character in enumerate(characters):
             # Create a surface for the avatar
-            avatar = pygame.Surface((60, 60), pygame.SRCALPHA)
+            avatar = pygame.Surface((AVATAR_SIZE, AVATAR_SIZE), pygame.SRCALPHA)
             
             # Draw circle with character color
-            pygame.draw.circle(avatar, colors[i % len(colors)], (30, 30), 30)
-            
-            # Get character initials
-            name_parts = character.name.split()
-            initials = "".join([part[0] for part in name_parts if part[0].isupper()])
+            center = AVATAR_SIZE // 2
+            pygame.draw.circle(avatar, colors[i % len(colors)], (center, center), center)
             
             # Draw initials
-            text = self.heading_font.render(initials, True, WHITE)
-            text_rect = text.get_rect(center=(30, 30))
+            text = self.heading_font.render(character.initials, True, WHITE)
+            text_rect = text.get_rect(center=(center, center))
             avatar.blit(text, text_rect)
             
             avatars[character.name] = avatar
+            bubble_avatars[character.name] = pygame.transform.scale(
+                avatar, (BUBBLE_AVATAR_SIZE, BUBBLE_AVATAR_SIZE)
+            )
         
-        return avatars
+        Assets._avatar_cache = (avatars, bubble_avatars)
+        return Assets._avatar_cache
     
     def _create_background(self):
-        """Create a background for the game."""
-        background = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-        background.fill(WHITE)
+        """Create a background for the game, shared by every instance."""
+        if Assets._background_cache is not None:
+            return Assets._background_cache
         
-        # Add some subtle grid lines
-        for x in range(0, SCREEN_WIDTH, 50):
-            pygame.draw.line(background, LIGHT_GRAY, (x, 0), (x, SCREEN_HEIGHT))
-        for y in range(0, SCREEN_HEIGHT, 50):
-            pygame.draw.line(background, LIGHT_GRAY, (0, y), (SCREEN_WIDTH, y))
+        # Add some subtle grid lines: white cells in a single batched blit,
+        # leaving one-pixel gray lines between them
+        background = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+        background.fill(LIGHT_GRAY)
+        cell = pygame.Surface((GRID_SIZE - 1, GRID_SIZE - 1))
+        cell.fill(WHITE)
+        background.blits([(cell, (x + 1, y + 1))
+                          for x in range(0, SCREEN_WIDTH, GRID_SIZE)
+                          for y in range(0, SCREEN_HEIGHT, GRID_SIZE)], doreturn=False)
         
         # Add a header area
         pygame.draw.rect(background, LIGHT_BLUE, (0, 0, SCREEN_WIDTH, 80))
         pygame.draw.line(background, DARK_BLUE, (0, 80), (SCREEN_WIDTH, 80), 2)
         
+        Assets._background_cache = background
         return background
     
     def draw_text(self, text, font, color, x, y, align="left", max_width=None):
@@ -146,40 +218,16 @@ class Assets:
         Returns:
             int: Y coordinate of the bottom of the text
         """
-        words = text.split(' ')
-        lines = []
-        current_line = []
-        
-        for word in words:
-            # Test width with current word added
-            test_line = ' '.join(current_line + [word])
-            test_width = font.size(test_line)[0]
-            
-            if test_width <= max_width:
-                current_line.append(word)
-            else:
-                # Start a new line if current line has content
-                if current_line:
-                    lines.append(' '.join(current_line))
-                    current_line = [word]
-                else:
-                    # If a single word is too long, force it on its own line
-                    lines.append(word)
-                    current_line = []
-        
-        # Add the last line
-        if current_line:
-            lines.append(' '.join(current_line))
-        
         # Draw each line
         current_y = y
-        for line in lines:
+        for line in wrap_lines(text, font, max_width):
             current_y = self.draw_text(line, font, color, x, current_y, align)
             current_y += font.get_linesize()
         
         return current_y
     
-    def draw_button(self, text, x, y, width, height, inactive_color, active_color, text_color=WHITE, border_radius=5):
+    def draw_button(self, text, x, y, width, height, inactive_color, active_color, text_color=WHITE, border_radius=5,
+                    clicks=()):
         """
         Draw a button and return if it was clicked.
         
@@ -191,12 +239,12 @@ class Assets:
             active_color: Color when hovered
             text_color: Text color
             border_radius (int): Corner radius
+            clicks: Positions of the mouse clicks this frame
         
         Returns:
             bool: True if button was clicked
         """
         mouse_pos = pygame.mouse.get_pos()
-        clicked = False
         
         # Check if mouse is over button
         button_rect = pygame.Rect(x, y, width, height)
@@ -211,13 +259,8 @@ class Assets:
         text_rect = text_surf.get_rect(center=button_rect.center)
         self.screen.blit(text_surf, text_rect)
         
-        # Check for click
-        if hover and pygame.mouse.get_pressed()[0]:
-            clicked = True
-            # Add a small delay to prevent multiple clicks
-            pygame.time.delay(200)
-        
-        return clicked
+        # Each press arrives as a single click, so there is nothing to debounce
+        return any(button_rect.collidepoint(pos) for pos in clicks)
     
     def draw_input_box(self, x, y, width, height, text, active):
         """
@@ -314,22 +357,21 @@ class Assets:
         Returns:
             int: Y coordinate of the bottom of the bubble
         """
-        # Get avatar
-        avatar = self.avatars.get(character_name)
+        # Get the avatar, pre-scaled for message bubbles
+        avatar = self.bubble_avatars.get(character_name)
         
         # Calculate padding and spacing
         padding = 10
-        avatar_size = 40 if avatar else 0
+        avatar_size = BUBBLE_AVATAR_SIZE if avatar else 0
         
-        # Draw the message text to calculate height
+        # Measure the message text from its wrapped lines; draw_wrapped_text
+        # advances a line and a line gap per line
         text_width = width - avatar_size - (padding * 3)
-        
-        # Create a temporary surface to measure text height
-        temp_surf = pygame.Surface((text_width, 1000), pygame.SRCALPHA)
-        temp_y = self.draw_wrapped_text(message, self.text_font, BLACK, 0, 0, text_width, "left")
+        lines = wrap_lines(message, self.text_font, text_width)
+        text_height = len(lines) * 2 * self.text_font.get_linesize()
         
         # Calculate bubble height
-        bubble_height = max(avatar_size + (padding * 2), temp_y + (padding * 2))
+        bubble_height = max(avatar_size + (padding * 2), text_height + (padding * 2))
         
         # Draw bubble background
         bubble_color = LIGHT_GRAY
@@ -341,9 +383,7 @@ class Assets:
         
         # Draw avatar
         if avatar:
-            # Scale down avatar for messages
-            scaled_avatar = pygame.transform.scale(avatar, (avatar_size, avatar_size))
-            self.screen.blit(scaled_avatar, (x + padding, y + padding))
+            self.screen.blit(avatar, (x + padding, y + padding))
         
         # Draw character name
         name_y = y + padding
@@ -3,6 +3,11 @@ Character profiles and management for the Reverse Turing Test game.
 """
 
 class Character:
+    # A game holds a handful of characters per player, so skip the per-instance
+    # __dict__; 'introduction' is only set in interrogation mode
+    __slots__ = ('name', 'profile', 'personality', 'background', 'speech_style', 'initials',
+                 'responses', 'suspicions', 'vote', 'introduction', '_prompt_description')
+    
     def __init__(self, name, profile, personality, background, speech_style):
         """
         Initialize a character with specific traits.
@@ -19,19 +24,37 @@ class Character:
         self.personality = personality
         self.background = background
         self.speech_style = speech_style
+        # Shown on the character's avatar
+        self.initials = "".join(part[0] for part in name.split() if part[0].isupper())
         self.responses = []
         self.suspicions = []
         self.vote = None
+        self._prompt_description = None
     
     def get_prompt_description(self):
         """
         Returns a description suitable for AI prompt context.
+        
+        The profile never changes during a game, so the description is built once.
         """
-        return (f"Character: {self.name}\n"
-                f"Profile: {self.profile}\n"
-                f"Personality: {self.personality}\n"
-                f"Background: {self.background}\n"
-                f"Speech Style: {self.speech_style}")
+        if self._prompt_description is None:
+            self._prompt_description = (f"Character: {self.name}\n"
+                                        f"Profile: {self.profile}\n"
+                                        f"Personality: {self.personality}\n"
+                                        f"Background: {self.background}\n"
+                                        f"Speech Style: {self.speech_style}")
+        return self._prompt_description
+    
+    def __getstate__(self):
+        """Pickle without the prompt description, which is rebuilt on first use."""
+        state = {slot: getattr(self, slot) for slot in self.__slots__ if hasattr(self, slot)}
+        state['_prompt_description'] = None
+        return state
+    
+    def __setstate__(self, state):
+        """Restore the slots saved by __getstate__."""
+        for slot, value in state.items():
+            setattr(self, slot, value)
     
     def add_response(self, response):
         """Add a response to this character's history."""
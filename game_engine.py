@@ -1,12 +1,11 @@
 """
 Game engine for the Reverse Turing Test game.
 """
-import random
-import time
 from character import get_character_profiles
 from questions import get_question_bank, select_game_questions
 from ai_player import AIPlayer
 from ai_judge import AIJudge
+from openai_client import warm_up_connections
 
 class GameEngine:
     def __init__(self, interface=None, num_rounds=5):
@@ -27,6 +26,7 @@ class GameEngine:
         self.ai_judges = []
         self.current_round = 0
         self.use_gui = False
+        self._discussion_speaker = None
     
     def setup_game(self):
         """Set up the game by selecting characters and questions."""
@@ -40,9 +40,8 @@ class GameEngine:
             self.human_character = self.characters[human_char_index]
             
             # Create AI players with remaining characters
-            for i, char in enumerate(self.characters):
-                if i != human_char_index:
-                    self.ai_players.append(self.create_ai_player(char))
+            ai_characters = self.characters[:human_char_index] + self.characters[human_char_index + 1:]
+            self.ai_players = [self.create_ai_player(char) for char in ai_characters]
             
             # Create AI judges with different approaches
             self.ai_judges = [
@@ -66,6 +65,9 @@ class GameEngine:
     
     def run_game(self):
         """Run the main game loop."""
+        # Connect to the API while the player reads the title screen and picks a character
+        warm_up_connections()
+        
         if self.use_gui:
             # GUI mode - the GUI will handle the game flow
             from gui import GUI
@@ -110,11 +112,8 @@ class GameEngine:
         # Show "thinking" message for AI responses
         print("\nAI characters are thinking...")
         
-        # Get AI responses
-        for ai_player in self.ai_players:
-            # Simulate thinking time
-            time.sleep(random.uniform(1.0, 2.5))
-            ai_player.generate_response(question, round_num)
+        # Get AI responses (the AI players answer concurrently)
+        AIPlayer.generate_all(self.ai_players, question, round_num)
         
         # Display all responses
         self.interface.display_responses(self.characters, round_num - 1)
@@ -122,11 +121,9 @@ class GameEngine:
         # Show "analyzing" message for AI judges
         print("\nAI judges are analyzing responses...")
         
-        # Get AI judge suspicions
-        for judge in self.ai_judges:
-            # Simulate thinking time
-            time.sleep(random.uniform(1.0, 2.0))
-            suspicion = judge.analyze_responses(self.characters, question, round_num)
+        # Get AI judge suspicions (the judges analyze concurrently)
+        suspicions = AIJudge.analyze_all(self.ai_judges, self.characters, question, round_num)
+        for judge, suspicion in zip(self.ai_judges, suspicions):
             print(f"Judge {judge.name}: {suspicion}")
     
     def run_voting_phase(self):
@@ -135,34 +132,28 @@ class GameEngine:
         print("The judges are now discussing and voting on who they think is the human player...")
         
         # Initial votes from AI judges
-        judge_votes = {}
-        for judge in self.ai_judges:
-            vote = judge.generate_vote(self.characters, self.game_questions)
-            judge_votes[judge.name] = vote
-            print(f"Judge {judge.name}'s initial vote: {vote}")
+        judge_votes = AIJudge.vote_all(self.ai_judges, self.characters, self.game_questions)
+        for judge_name, vote in judge_votes.items():
+            print(f"Judge {judge_name}'s initial vote: {vote}")
         
         # Have judges discuss and try to reach consensus
         print("\n===== JUDGES' DISCUSSION =====\n")
         main_judge = self.ai_judges[0]  # Use the first judge to lead the discussion
         other_judges = self.ai_judges[1:]
         
+        # The discussion is displayed as the judges' messages are generated
+        self._discussion_speaker = None
         final_verdict, discussion_history = main_judge.discuss(
-            other_judges, self.characters, self.game_questions
+            other_judges, self.characters, self.game_questions, initial_votes=judge_votes,
+            on_message_delta=self._display_discussion_delta
         )
+        print()
         
-        # Display the discussion
-        for round_idx, round_messages in enumerate(discussion_history):
-            print(f"\n--- DISCUSSION ROUND {round_idx + 1} ---")
-            for message in round_messages:
-                print(f"{message['judge']}: {message['message']}")
-        
-        # Get final votes after discussion
-        final_judge_votes = {}
-        for judge in self.ai_judges:
-            # Check if the judge's vote changed during discussion
-            if judge.name in judge_votes and judge_votes[judge.name] != final_verdict:
-                print(f"Judge {judge.name} changed their vote from {judge_votes[judge.name]} to {final_verdict}")
-            final_judge_votes[judge.name] = final_verdict
+        # Every judge's final vote is the verdict; report the judges whose vote changed during discussion
+        final_judge_votes = {judge.name: final_verdict for judge in self.ai_judges}
+        for judge_name, vote in judge_votes.items():
+            if vote != final_verdict:
+                print(f"Judge {judge_name} changed their vote from {vote} to {final_verdict}")
         
         # Store the discussion history and final votes
         self.judge_discussion = discussion_history
@@ -184,6 +175,15 @@ class GameEngine:
         
         return not human_identified
         
+    def _display_discussion_delta(self, round_num, judge_name, text):
+        """Print a piece of a judge's discussion message as it is generated."""
+        if self._discussion_speaker != (round_num, judge_name):
+            if self._discussion_speaker is None or self._discussion_speaker[0] != round_num:
+                print(f"\n--- DISCUSSION ROUND {round_num} ---", end="")
+            print(f"\n{judge_name}: ", end="")
+            self._discussion_speaker = (round_num, judge_name)
+        print(text, end="", flush=True)
+        
     def reset(self):
         """Reset the game state for a new game."""
         self.game_questions = []
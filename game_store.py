@@ -0,0 +1,109 @@
+"""
+Server-side storage of game states for the Reverse Turing Test web app.
+
+Games expire after GAME_TTL_SECONDS without activity, so abandoned games do
+not pile up in memory. Set REDIS_URL to keep the games in Redis instead of the
+process, which lets several server workers share them.
+"""
+import os
+import pickle
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+# Seconds a game is kept after its last request
+GAME_TTL_SECONDS = int(os.getenv("GAME_TTL_SECONDS", "3600"))
+
+# Prefix of the game keys in Redis
+REDIS_KEY_PREFIX = "reverse-turing-test:game:"
+
+# zlib level for the pickled games in Redis; the fastest level already shrinks
+# the text-heavy states about fourfold
+REDIS_COMPRESSION_LEVEL = 1
+
+
+class MemoryGameStore:
+    """Game states held in this process, evicted once they expire."""
+
+    def __init__(self, ttl=GAME_TTL_SECONDS):
+        self.ttl = ttl
+        # game_id -> (expiry time, game state), least recently used first
+        self._games = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, game_id):
+        """
+        Look up a game and extend its lifetime.
+
+        Returns:
+            dict: The game state, or None if there is no such (unexpired) game
+        """
+        with self._lock:
+            entry = self._games.get(game_id)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._games[game_id]
+                return None
+            self._games[game_id] = (time.monotonic() + self.ttl, entry[1])
+            self._games.move_to_end(game_id)
+            return entry[1]
+
+    def save(self, game_id, game_state):
+        """Store a game state, evicting games that have expired."""
+        with self._lock:
+            now = time.monotonic()
+            self._games[game_id] = (now + self.ttl, game_state)
+            self._games.move_to_end(game_id)
+            # Entries are ordered by last use, so the expired ones come first
+            while self._games:
+                oldest_id, (expiry, _) = next(iter(self._games.items()))
+                if expiry >= now:
+                    break
+                del self._games[oldest_id]
+
+    def delete(self, game_id):
+        """Remove a game, if it exists."""
+        with self._lock:
+            self._games.pop(game_id, None)
+
+
+class RedisGameStore:
+    """Game states pickled and compressed into Redis with a per-game expiry."""
+
+    def __init__(self, url, ttl=GAME_TTL_SECONDS):
+        import redis
+        self.ttl = ttl
+        self._redis = redis.Redis.from_url(url)
+
+    def get(self, game_id):
+        """
+        Look up a game and extend its lifetime.
+
+        Returns:
+            dict: The game state, or None if there is no such (unexpired) game
+        """
+        key = REDIS_KEY_PREFIX + game_id
+        pipeline = self._redis.pipeline()
+        pipeline.get(key)
+        pipeline.expire(key, self.ttl)
+        data, _ = pipeline.execute()
+        return pickle.loads(zlib.decompress(data)) if data is not None else None
+
+    def save(self, game_id, game_state):
+        """Store a game state."""
+        data = zlib.compress(pickle.dumps(game_state, pickle.HIGHEST_PROTOCOL), REDIS_COMPRESSION_LEVEL)
+        self._redis.setex(REDIS_KEY_PREFIX + game_id, self.ttl, data)
+
+    def delete(self, game_id):
+        """Remove a game, if it exists."""
+        self._redis.delete(REDIS_KEY_PREFIX + game_id)
+
+
+def create_game_store():
+    """Create the game store: Redis when REDIS_URL is set, otherwise in-process memory."""
+    redis_url = os.getenv("REDIS_URL")
+    if redis_url:
+        return RedisGameStore(redis_url)
+    return MemoryGameStore()
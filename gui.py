@@ -2,7 +2,9 @@
 Graphical user interface for the Reverse Turing Test game.
 """
 import sys
+from collections import Counter, defaultdict
 import pygame
+from ai_player import AIPlayer
 from assets import Assets, SCREEN_WIDTH, SCREEN_HEIGHT, BLACK, WHITE, BLUE, DARK_BLUE, RED, GREEN, GRAY, LIGHT_GRAY
 
 class GUI:
@@ -20,6 +22,8 @@ class GUI:
         self.input_rect = None
         self.scroll_y = 0
         self.max_scroll = 0
+        # Positions of the left clicks in the current frame
+        self.clicks = []
         
         # Initialize screens
         self.screens = {
@@ -63,6 +67,7 @@ class GUI:
         # Main game loop
         while self.running:
             # Handle events
+            self.clicks = []
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     self.running = False
@@ -70,8 +75,7 @@ class GUI:
                 
                 self.handle_event(event)
             
-            # Draw the current screen
-            self.screen.fill(WHITE)
+            # Draw the current screen; the background covers all of it
             self.screen.blit(self.assets.background, (0, 0))
             
             # Call the current screen function
@@ -96,6 +100,10 @@ class GUI:
             self.scroll_y += event.y * 20
             self.scroll_y = max(min(self.scroll_y, 0), -self.max_scroll)
         
+        # Collect clicks for the buttons of the current screen
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            self.clicks.append(event.pos)
+        
         # Handle text input
         if event.type == pygame.MOUSEBUTTONDOWN:
             # Check if the user clicked on the input box
@@ -127,13 +135,13 @@ class GUI:
         # Draw start button
         start_y = subtitle_y + 100
         start_clicked = self.assets.draw_button(
-            "Start Game", SCREEN_WIDTH/2 - 100, start_y, 200, 50, BLUE, DARK_BLUE
+            "Start Game", SCREEN_WIDTH/2 - 100, start_y, 200, 50, BLUE, DARK_BLUE, clicks=self.clicks
         )
         
         # Draw exit button
         exit_y = start_y + 80
         exit_clicked = self.assets.draw_button(
-            "Exit", SCREEN_WIDTH/2 - 100, exit_y, 200, 50, RED, (200, 0, 0)
+            "Exit", SCREEN_WIDTH/2 - 100, exit_y, 200, 50, RED, (200, 0, 0), clicks=self.clicks
         )
         
         # Handle button clicks
@@ -170,13 +178,13 @@ class GUI:
             )
             
             # Check for card click
-            if pygame.mouse.get_pressed()[0] and card_rect.collidepoint(pygame.mouse.get_pos()):
+            if any(card_rect.collidepoint(pos) for pos in self.clicks):
                 self.game_state["selected_character_index"] = i
         
         # Draw select button
         button_y = card_y + (len(self.game_state["all_characters"]) * (card_height + card_spacing)) + 20
         select_clicked = self.assets.draw_button(
-            "Select Character", SCREEN_WIDTH/2 - 100, button_y, 200, 50, BLUE, DARK_BLUE
+            "Select Character", SCREEN_WIDTH/2 - 100, button_y, 200, 50, BLUE, DARK_BLUE, clicks=self.clicks
         )
         
         # Handle button click
@@ -188,10 +196,10 @@ class GUI:
             self.game_engine.human_character = self.game_state["human_character"]
             
             # Create AI players with remaining characters
-            self.game_engine.ai_players = []
-            for i, char in enumerate(self.game_state["all_characters"]):
-                if i != self.game_state["selected_character_index"]:
-                    self.game_engine.ai_players.append(self.game_engine.create_ai_player(char))
+            all_characters = self.game_state["all_characters"]
+            selected_index = self.game_state["selected_character_index"]
+            ai_characters = all_characters[:selected_index] + all_characters[selected_index + 1:]
+            self.game_engine.ai_players = [self.game_engine.create_ai_player(char) for char in ai_characters]
             
             # Select questions for the game
             self.game_engine.game_questions = self.game_engine.select_game_questions()
@@ -242,7 +250,7 @@ class GUI:
         # Draw submit button
         button_y = input_box_y + 120
         submit_clicked = self.assets.draw_button(
-            "Submit Response", SCREEN_WIDTH/2 - 100, button_y, 200, 50, BLUE, DARK_BLUE
+            "Submit Response", SCREEN_WIDTH/2 - 100, button_y, 200, 50, BLUE, DARK_BLUE, clicks=self.clicks
         )
         
         # Handle button click
@@ -251,12 +259,12 @@ class GUI:
                 # Save human response
                 self.game_state["human_character"].add_response(self.input_text)
                 
-                # Get AI responses
-                for ai_player in self.game_engine.ai_players:
-                    ai_player.generate_response(
-                        self.game_state["current_question"], 
-                        self.game_state["current_round"]
-                    )
+                # Get AI responses (requested together rather than one player at a time)
+                AIPlayer.generate_all(
+                    self.game_engine.ai_players,
+                    self.game_state["current_question"],
+                    self.game_state["current_round"]
+                )
                 
                 # Move to responses screen
                 self.current_screen = "responses"
@@ -296,7 +304,7 @@ class GUI:
         # Draw continue button
         button_y = SCREEN_HEIGHT - 80
         continue_clicked = self.assets.draw_button(
-            "Continue to Suspicions", SCREEN_WIDTH/2 - 120, button_y, 240, 50, BLUE, DARK_BLUE
+            "Continue to Suspicions", SCREEN_WIDTH/2 - 120, button_y, 240, 50, BLUE, DARK_BLUE, clicks=self.clicks
         )
         
         # Handle button click
@@ -330,7 +338,7 @@ class GUI:
             # Draw submit button
             button_y = input_y + 120
             submit_clicked = self.assets.draw_button(
-                "Submit Suspicion", SCREEN_WIDTH/2 - 100, button_y, 200, 50, BLUE, DARK_BLUE
+                "Submit Suspicion", SCREEN_WIDTH/2 - 100, button_y, 200, 50, BLUE, DARK_BLUE, clicks=self.clicks
             )
             
             # Handle button click
@@ -339,13 +347,13 @@ class GUI:
                     # Save human suspicion
                     self.game_state["human_character"].add_suspicion(self.input_text)
                     
-                    # Get AI suspicions
-                    for ai_player in self.game_engine.ai_players:
-                        ai_player.analyze_responses(
-                            self.game_state["all_characters"],
-                            self.game_state["current_question"],
-                            self.game_state["current_round"]
-                        )
+                    # Get AI suspicions (the round's responses are formatted once for all players)
+                    AIPlayer.analyze_all(
+                        self.game_engine.ai_players,
+                        self.game_state["all_characters"],
+                        self.game_state["current_question"],
+                        self.game_state["current_round"]
+                    )
                     
                     self.input_text = ""
                     self.scroll_y = 0
@@ -376,7 +384,7 @@ class GUI:
                 continue_text = "Continue to Voting"
             
             continue_clicked = self.assets.draw_button(
-                continue_text, SCREEN_WIDTH/2 - 120, button_y, 240, 50, BLUE, DARK_BLUE
+                continue_text, SCREEN_WIDTH/2 - 120, button_y, 240, 50, BLUE, DARK_BLUE, clicks=self.clicks
             )
             
             # Handle button click
@@ -439,10 +447,8 @@ class GUI:
                                     option_x + 60, options_y + option_height/2, align="left")
                 
                 # Check for click
-                if hover and pygame.mouse.get_pressed()[0]:
+                if any(option_rect.collidepoint(pos) for pos in self.clicks):
                     selected_vote = character.name
-                    # Add a small delay to prevent multiple clicks
-                    pygame.time.delay(200)
                 
                 options_y += option_height + option_spacing
         
@@ -451,9 +457,8 @@ class GUI:
             # Set human vote
             self.game_state["human_character"].set_vote(selected_vote)
             
-            # Get AI votes
-            for ai_player in self.game_engine.ai_players:
-                ai_player.generate_vote(self.game_state["all_characters"])
+            # Get AI votes (the game history is formatted once for all players)
+            AIPlayer.vote_all(self.game_engine.ai_players, self.game_state["all_characters"])
             
             # Move to results screen
             self.current_screen = "results"
@@ -465,11 +470,9 @@ class GUI:
         self.assets.draw_text("Voting Results", self.assets.heading_font, WHITE, SCREEN_WIDTH/2, header_y, align="center")
         
         # Collect votes
-        votes = {}
+        votes = defaultdict(list)
         for character in self.game_state["all_characters"]:
             if character.vote:
-                if character.vote not in votes:
-                    votes[character.vote] = []
                 votes[character.vote].append(character.name)
         
         # Draw votes
@@ -493,19 +496,15 @@ class GUI:
                             100, current_y, align="left")
         current_y += 40
         
-        # Determine the character with the most votes
-        most_votes = 0
-        voted_character = None
-        
-        for name, voters in votes.items():
-            vote_text = f"{name}: {len(voters)} vote(s)"
+        vote_counts = Counter({name: len(voters) for name, voters in votes.items()})
+        for name, count in vote_counts.items():
+            vote_text = f"{name}: {count} vote(s)"
             self.assets.draw_text(vote_text, self.assets.text_font, BLACK, 
                                 120, current_y, align="left")
             current_y += 30
-            
-            if len(voters) > most_votes:
-                most_votes = len(voters)
-                voted_character = name
+        
+        # Determine the character with the most votes (ties go to the first one voted for)
+        voted_character = vote_counts.most_common(1)[0][0] if vote_counts else None
         
         # Draw result
         current_y += 20
@@ -538,12 +537,12 @@ class GUI:
         # Draw play again button
         button_y = SCREEN_HEIGHT - 80
         play_again_clicked = self.assets.draw_button(
-            "Play Again", SCREEN_WIDTH/2 - 200, button_y, 180, 50, BLUE, DARK_BLUE
+            "Play Again", SCREEN_WIDTH/2 - 200, button_y, 180, 50, BLUE, DARK_BLUE, clicks=self.clicks
         )
         
         # Draw exit button
         exit_clicked = self.assets.draw_button(
-            "Exit", SCREEN_WIDTH/2 + 20, button_y, 180, 50, RED, (200, 0, 0)
+            "Exit", SCREEN_WIDTH/2 + 20, button_y, 180, 50, RED, (200, 0, 0), clicks=self.clicks
         )
         
         # Handle button clicks
@@ -3,6 +3,7 @@ Human interface for the Reverse Turing Test game.
 """
 import os
 import sys
+from collections import Counter
 import pygame
 from colorama import init, Fore, Style
 
@@ -162,11 +163,9 @@ class TerminalInterface:
         self.display_title()
         print(f"\n{Fore.YELLOW}Final Votes:{Style.RESET_ALL}\n")
         
-        votes = {}
+        votes = Counter()
         for char in characters:
             if char.vote:
-                if char.vote not in votes:
-                    votes[char.vote] = 0
                 votes[char.vote] += 1
                 print(f"{Fore.CYAN}{char.name}{Style.RESET_ALL} votes for: {char.vote}")
         
@@ -174,13 +173,8 @@ class TerminalInterface:
         for name, count in votes.items():
             print(f"{name}: {count} vote(s)")
         
-        # Determine the character with the most votes
-        most_votes = 0
-        voted_character = None
-        for name, count in votes.items():
-            if count > most_votes:
-                most_votes = count
-                voted_character = name
+        # Determine the character with the most votes (ties go to the first one voted for)
+        voted_character = votes.most_common(1)[0][0] if votes else None
         
         print(f"\n{Fore.YELLOW}The group has voted that {voted_character} is the human!{Style.RESET_ALL}")
         
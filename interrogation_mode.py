@@ -2,9 +2,9 @@
 Interrogation mode for the Reverse Turing Test game.
 """
 import random
-import time
 from character import get_character_profiles
-from ai_player import AIPlayer
+from ai_player import AIPlayer, HISTORY_VERBATIM_ROUNDS, SHORT_REPLY_MAX_TOKENS, VOTE_MAX_TOKENS, first_sentence, history_text
+from openai_client import run_concurrently, vote_response_format, warm_up_connections
 
 class InterrogationGameEngine:
     """Game engine for the pure interrogation mode."""
@@ -39,14 +39,16 @@ class InterrogationGameEngine:
             self.human_character = self.characters[human_char_index]
             
             # Create AI players with remaining characters
-            for i, char in enumerate(self.characters):
-                if i != human_char_index:
-                    self.ai_players.append(AIPlayer(char))
+            ai_characters = self.characters[:human_char_index] + self.characters[human_char_index + 1:]
+            self.ai_players = [AIPlayer(char) for char in ai_characters]
         
         return True
     
     def run_game(self):
         """Run the main game loop."""
+        # Connect to the API while the player reads the title screen and picks a character
+        warm_up_connections()
+        
         if self.use_gui:
             # GUI mode - the GUI will handle the game flow
             from interrogation_gui import InterrogationGUI
@@ -91,13 +93,12 @@ class InterrogationGameEngine:
         # AI players introduce themselves
         print("\nOther characters are introducing themselves...")
         
-        for ai_player in self.ai_players:
-            # Generate introduction
-            introduction = self._generate_introduction(ai_player)
+        # Generate all introductions at once
+        introductions = run_concurrently(
+            self._generate_introduction(ai_player) for ai_player in self.ai_players
+        )
+        for ai_player, introduction in zip(self.ai_players, introductions):
             ai_player.character.introduction = introduction
-            
-            # Simulate thinking time
-            time.sleep(random.uniform(1.0, 2.0))
         
         # Display all introductions
         self.interface.display_introductions(self.characters)
@@ -156,9 +157,6 @@ class InterrogationGameEngine:
                 
                 # AI generates question
                 question = self._generate_question(ai_player, target, round_num)
-                
-                # Simulate thinking time
-                time.sleep(random.uniform(1.0, 2.0))
             
             # Display the question
             self.interface.display_interrogation_question(interrogator.name, target.name, question)
@@ -173,9 +171,6 @@ class InterrogationGameEngine:
                 # AI responds to interrogation
                 ai_target = next(ai for ai in self.ai_players if ai.character == target)
                 response = self._generate_response(ai_target, question, interrogator)
-                
-                # Simulate thinking time
-                time.sleep(random.uniform(1.0, 2.0))
             
             # Display the response
             self.interface.display_interrogation_response(target.name, response)
@@ -209,13 +204,13 @@ class InterrogationGameEngine:
         # Get AI suspicions
         print("\nAI characters are forming their suspicions...")
         
-        for ai_player in self.ai_players:
-            # Generate suspicion based on interrogations
-            suspicion = self._generate_suspicion(ai_player, round_num)
+        # Generate all suspicions based on interrogations at once, from one copy of the round's history
+        round_history = self._format_round_interrogations(round_num)
+        suspicions = run_concurrently(
+            self._generate_suspicion(ai_player, round_num, round_history) for ai_player in self.ai_players
+        )
+        for ai_player, suspicion in zip(self.ai_players, suspicions):
             ai_player.character.add_suspicion(suspicion)
-            
-            # Simulate thinking time
-            time.sleep(random.uniform(1.0, 2.0))
         
         # Display all suspicions
         self.interface.display_suspicions(self.characters, round_num - 1)
@@ -247,12 +242,8 @@ class InterrogationGameEngine:
         
         # Get AI votes
         print("\nAI characters are voting...")
-        for ai_player in self.ai_players:
-            # Generate vote based on all interrogations and suspicions
-            vote = self._generate_vote(ai_player)
-            
-            # Simulate thinking time
-            time.sleep(random.uniform(1.0, 1.5))
+        # Generate all votes based on all interrogations and suspicions at once
+        run_concurrently(self._generate_vote(ai_player) for ai_player in self.ai_players)
         
         # Display votes and results
         human_won = self.interface.display_votes(self.characters, self.human_character)
@@ -262,7 +253,7 @@ class InterrogationGameEngine:
         
         return human_won
     
-    def _generate_introduction(self, ai_player):
+    async def _generate_introduction(self, ai_player):
         """Generate an introduction for an AI character."""
         prompt = f"""
         You are roleplaying as {ai_player.character.name} in a game.
@@ -273,7 +264,7 @@ class InterrogationGameEngine:
         Don't reveal that you're an AI - just introduce yourself naturally as your character would.
         """
         
-        return ai_player._call_openai_api(prompt)
+        return await ai_player._call_openai_api_async(prompt, max_tokens=SHORT_REPLY_MAX_TOKENS)
     
     def _choose_interrogation_target(self, ai_player, available_targets, round_num):
         """Choose which character to interrogate."""
@@ -283,7 +274,8 @@ class InterrogationGameEngine:
         
         # Otherwise, use AI to choose based on previous interactions
         prompt = self._create_target_selection_prompt(ai_player, available_targets, round_num)
-        response = ai_player._call_openai_api(prompt)
+        # The choice is a deterministic function of the game so far, so it is cached
+        response = ai_player._call_openai_api_cached(prompt, max_tokens=VOTE_MAX_TOKENS)
         
         # Extract the character name from the response
         for target in available_targets:
@@ -295,23 +287,9 @@ class InterrogationGameEngine:
     
     def _create_target_selection_prompt(self, ai_player, available_targets, round_num):
         """Create prompt for selecting an interrogation target."""
-        # Build history of previous interrogations
-        history = ""
-        for r in range(1, round_num):
-            if r in self.interrogation_history:
-                history += f"--- ROUND {r} INTERROGATIONS ---\n"
-                for data in self.interrogation_history[r]:
-                    history += f"{data['interrogator'].name} asked {data['target'].name}: \"{data['question']}\"\n"
-                    history += f"{data['target'].name} responded: \"{data['response']}\"\n\n"
-        
-        # Build suspicion history
-        suspicion_history = ""
-        for char in self.characters:
-            if char.suspicions:
-                suspicion_history += f"{char.name}'s suspicions:\n"
-                for r, suspicion in enumerate(char.suspicions):
-                    suspicion_history += f"After round {r+1}: \"{suspicion}\"\n"
-                suspicion_history += "\n"
+        # Build history of previous interrogations and suspicions
+        history = self._format_interrogation_history(round_num)
+        suspicion_history = self._format_suspicion_history(round_num)
         
         # Create the prompt
         target_names = [t.name for t in available_targets]
@@ -342,13 +320,15 @@ class InterrogationGameEngine:
     def _generate_question(self, ai_player, target, round_num):
         """Generate a targeted question for another character."""
         # Build history of previous interactions with this target
-        history = ""
+        parts = []
         for r in range(1, round_num):
-            if r in self.interrogation_history:
-                for data in self.interrogation_history[r]:
-                    if data['target'] == target:
-                        history += f"In round {r}, {data['interrogator'].name} asked: \"{data['question']}\"\n"
-                        history += f"{target.name} responded: \"{data['response']}\"\n\n"
+            brief = r < round_num - HISTORY_VERBATIM_ROUNDS
+            parts.extend(
+                f"In round {r}, {data['interrogator'].name} asked: \"{data['question']}\"\n"
+                f"{target.name} responded: \"{history_text(data['response'], brief)}\"\n\n"
+                for data in self.interrogation_history.get(r, []) if data['target'] == target
+            )
+        history = "".join(parts)
         
         # Create the prompt
         prompt = f"""
@@ -370,7 +350,7 @@ class InterrogationGameEngine:
         Make your question clever and designed to reveal if they break the pattern of the AI group.
         """
         
-        return ai_player._call_openai_api(prompt)
+        return ai_player._call_openai_api(prompt, max_tokens=SHORT_REPLY_MAX_TOKENS)
     
     def _generate_response(self, ai_player, question, questioner):
         """Generate a response to an interrogation question."""
@@ -386,17 +366,10 @@ class InterrogationGameEngine:
         Remember that you are trying to appear as an AI character would, not revealing any human traits.
         """
         
-        return ai_player._call_openai_api(prompt)
+        return ai_player._call_openai_api(prompt, max_tokens=SHORT_REPLY_MAX_TOKENS)
     
-    def _generate_suspicion(self, ai_player, round_num):
-        """Generate suspicions based on interrogations."""
-        # Build history of all interrogations in this round
-        round_history = ""
-        if round_num in self.interrogation_history:
-            for data in self.interrogation_history[round_num]:
-                round_history += f"{data['interrogator'].name} asked {data['target'].name}: \"{data['question']}\"\n"
-                round_history += f"{data['target'].name} responded: \"{data['response']}\"\n\n"
-        
+    async def _generate_suspicion(self, ai_player, round_num, round_history):
+        """Generate suspicions based on the round's formatted interrogations."""
         # Create the prompt
         prompt = f"""
         You are roleplaying as {ai_player.character.name} in a game where one player is human and the rest are AI.
@@ -416,26 +389,13 @@ class InterrogationGameEngine:
         Use your character's speech style. Name specifically who you are suspecting and why they stand out from the group.
         """
         
-        return ai_player._call_openai_api(prompt)
+        return await ai_player._call_openai_api_async(prompt, max_tokens=SHORT_REPLY_MAX_TOKENS)
     
-    def _generate_vote(self, ai_player):
+    async def _generate_vote(self, ai_player):
         """Generate final vote on who is the human."""
-        # Build complete history of all interrogations
-        full_history = ""
-        for round_num in sorted(self.interrogation_history.keys()):
-            full_history += f"--- ROUND {round_num} INTERROGATIONS ---\n"
-            for data in self.interrogation_history[round_num]:
-                full_history += f"{data['interrogator'].name} asked {data['target'].name}: \"{data['question']}\"\n"
-                full_history += f"{data['target'].name} responded: \"{data['response']}\"\n\n"
-        
-        # Build suspicion history
-        suspicion_history = ""
-        for char in self.characters:
-            if char.suspicions:
-                suspicion_history += f"{char.name}'s suspicions:\n"
-                for r, suspicion in enumerate(char.suspicions):
-                    suspicion_history += f"After round {r+1}: \"{suspicion}\"\n"
-                suspicion_history += "\n"
+        # Build complete history of all interrogations and suspicions
+        full_history = self._format_interrogation_history(self.num_rounds + 1)
+        suspicion_history = self._format_suspicion_history(self.num_rounds + 1)
         
         # Create the prompt
         prompt = f"""
@@ -460,17 +420,48 @@ class InterrogationGameEngine:
         Respond with just the character's name that you're voting for.
         """
         
-        vote = ai_player._call_openai_api(prompt)
-        
-        # Extract just the character name from the response
-        for character in self.characters:
-            if character.name.lower() in vote.lower():
-                ai_player.character.set_vote(character.name)
-                return character.name
+        # The reply is constrained to a character name, so no extraction pass is needed;
+        # a vote is a deterministic function of the game so far, so it is cached
+        vote = await ai_player._call_openai_api_async_cached(
+            prompt, vote_response_format(["vote"], self.characters), VOTE_MAX_TOKENS
+        )
+        return ai_player._set_vote_from_response(vote, self.characters)
+    
+    def _format_interrogation_history(self, round_num):
+        """
+        Format the interrogations of the rounds before round_num for a prompt.
         
-        # If no clear match, use the first character mentioned
-        ai_player.character.set_vote(self.characters[0].name)
-        return self.characters[0].name
+        The last HISTORY_VERBATIM_ROUNDS rounds are included verbatim; earlier
+        rounds, which the suspicions already summarize, keep only the first
+        sentence of each response.
+        """
+        parts = []
+        for r in range(1, round_num):
+            if r in self.interrogation_history:
+                parts.append(f"--- ROUND {r} INTERROGATIONS ---\n")
+                parts.append(self._format_round_interrogations(r, r < round_num - HISTORY_VERBATIM_ROUNDS))
+        return "".join(parts)
+    
+    def _format_round_interrogations(self, round_num, brief=False):
+        """Format a round's interrogations, with only the first sentence of each response if brief."""
+        return "".join(
+            f"{data['interrogator'].name} asked {data['target'].name}: \"{data['question']}\"\n"
+            f"{data['target'].name} responded: \"{history_text(data['response'], brief)}\"\n\n"
+            for data in self.interrogation_history.get(round_num, [])
+        )
+    
+    def _format_suspicion_history(self, round_num):
+        """Format every character's suspicions for a prompt, older rounds in brief."""
+        parts = []
+        for char in self.characters:
+            if char.suspicions:
+                parts.append(f"{char.name}'s suspicions:\n")
+                for r, suspicion in enumerate(char.suspicions, 1):
+                    if r < round_num - HISTORY_VERBATIM_ROUNDS:
+                        suspicion = first_sentence(suspicion)
+                    parts.append(f"After round {r}: \"{suspicion}\"\n")
+                parts.append("\n")
+        return "".join(parts)
     
     def reset(self):
         """Reset the game state for a new game."""
@@ -3,11 +3,10 @@ Main entry point for the Reverse Turing Test game.
 """
 import os
 import sys
+import logging
 import argparse
 from dotenv import load_dotenv
 from human_interface import TerminalInterface
-from game_engine import GameEngine
-from interrogation_mode import InterrogationGameEngine
 
 def check_api_key():
     """Check if OpenAI API key is available."""
@@ -32,15 +31,21 @@ def main():
                       help='Game mode: standard (preset questions) or interrogation (characters question each other)')
     args = parser.parse_args()
     
+    logging.basicConfig(level=logging.INFO)
+    
     # Check for API key
     if not check_api_key():
         input("Press Enter to exit...")
         sys.exit(1)
     
-    # Create appropriate game engine based on mode
+    # Create appropriate game engine based on mode. The engines pull in the
+    # OpenAI client, so only the one being played is imported, and only once
+    # the arguments and API key have been checked.
     if args.mode == 'interrogation':
+        from interrogation_mode import InterrogationGameEngine
         game = InterrogationGameEngine(None)
     else:
+        from game_engine import GameEngine
         game = GameEngine()
     
     # Set terminal interface
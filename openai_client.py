@@ -0,0 +1,486 @@
+"""
+Shared OpenAI connection handling for the Reverse Turing Test game.
+
+Every chat completion of the AI players and judges goes through this module,
+so HTTPS connections are pooled and reused instead of paying a TLS handshake
+per call, requests stay within the account's rate limits, and transient
+failures are retried with exponential backoff.
+"""
+import asyncio
+import atexit
+import functools
+import hashlib
+import logging
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+import aiohttp
+import openai
+import orjson
+import requests
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+# Load environment variables
+load_dotenv()
+
+# Set OpenAI API key
+openai.api_key = os.getenv("OPENAI_API_KEY")
+
+# Reply returned when the OpenAI API cannot be reached
+API_ERROR_RESPONSE = "I'm having trouble connecting to my knowledge base right now."
+
+# Replies to deterministic (temperature 0) prompts, keyed by prompt hash
+RESPONSE_CACHE_SIZE = 1024
+_response_cache = OrderedDict()
+_response_cache_lock = threading.Lock()
+
+# Connection pool limits and per-request timeout (seconds)
+MAX_KEEPALIVE_CONNECTIONS = 32
+MAX_CONNECTIONS = 64
+REQUEST_TIMEOUT = 30
+
+# Account rate limits the game schedules its requests within
+MAX_REQUESTS_PER_MINUTE = int(os.getenv("OPENAI_MAX_REQUESTS_PER_MINUTE", "500"))
+MAX_TOKENS_PER_MINUTE = int(os.getenv("OPENAI_MAX_TOKENS_PER_MINUTE", "30000"))
+
+# Requests in flight at once, for the threads and for the event loop each, so
+# bursts of concurrent calls are smoothed out instead of all hitting the API together
+MAX_CONCURRENT_REQUESTS = int(os.getenv("OPENAI_MAX_CONCURRENT", "16"))
+
+# Retry policy for transient API failures (seconds between attempts grow
+# exponentially, with random jitter, from RETRY_MIN_WAIT up to RETRY_MAX_WAIT)
+MAX_ATTEMPTS = 5
+RETRY_MIN_WAIT = 1
+RETRY_MAX_WAIT = 20
+RETRYABLE_ERRORS = (
+    openai.error.RateLimitError,
+    openai.error.APIConnectionError,
+    openai.error.Timeout,
+    openai.error.ServiceUnavailableError,
+    openai.error.TryAgain,
+    openai.error.APIError,
+)
+
+
+class _CapacityLimiter:
+    """Token bucket refilled continuously up to a per-minute capacity."""
+    
+    def __init__(self, per_minute):
+        self.capacity = per_minute
+        self.available = per_minute
+        self.last_update = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def reserve(self, amount):
+        """
+        Take amount from the bucket, going into debt if it is short.
+        
+        Returns:
+            float: Seconds to wait before the reserved capacity is available
+        """
+        amount = min(amount, self.capacity)
+        with self.lock:
+            now = time.monotonic()
+            self.available = min(
+                self.capacity, self.available + (now - self.last_update) * self.capacity / 60
+            )
+            self.last_update = now
+            self.available -= amount
+            if self.available >= 0:
+                return 0
+            return -self.available * 60 / self.capacity
+
+
+_request_limiter = _CapacityLimiter(MAX_REQUESTS_PER_MINUTE)
+_token_limiter = _CapacityLimiter(MAX_TOKENS_PER_MINUTE)
+
+_request_slots = threading.BoundedSemaphore(MAX_CONCURRENT_REQUESTS)
+# Created on the event loop that uses it (see _get_async_request_slots)
+_async_request_slots = None
+
+
+def _get_async_request_slots():
+    """Get the semaphore limiting concurrent async requests (called on the shared event loop)."""
+    global _async_request_slots
+    if _async_request_slots is None:
+        _async_request_slots = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    return _async_request_slots
+
+
+def _reserve_capacity(kwargs):
+    """Reserve rate-limit capacity for a request; returns the seconds to wait before sending it."""
+    # Roughly 4 characters per prompt token, plus the requested completion budget
+    prompt_chars = sum(len(message["content"]) for message in kwargs.get("messages", []))
+    tokens = prompt_chars // 4 + kwargs.get("max_tokens", 0)
+    return max(_request_limiter.reserve(1), _token_limiter.reserve(tokens))
+
+
+def _retry_wait(attempt):
+    """Seconds to wait before retry number attempt (1-based)."""
+    return random.uniform(RETRY_MIN_WAIT, min(RETRY_MAX_WAIT, RETRY_MIN_WAIT * 2 ** attempt))
+
+
+def response_cache_key(model, prompt, response_format=None, system_prompt=""):
+    """Hash a request (model, system prompt, prompt and response format) into a response cache key."""
+    request_text = f"{model}\n{response_format}\n{system_prompt}\n{prompt}"
+    return hashlib.blake2b(request_text.encode(), digest_size=16).digest()
+
+
+def get_cached_response(cache_key):
+    """
+    Look up a cached reply.
+    
+    Returns:
+        str: The cached reply, or None if the request has not been cached
+    """
+    with _response_cache_lock:
+        if cache_key not in _response_cache:
+            return None
+        _response_cache.move_to_end(cache_key)
+        return _response_cache[cache_key]
+
+
+def cache_response(cache_key, response):
+    """Store a reply in the response cache, evicting the least recently used entry."""
+    # Never cache the fallback reply, so a failed call is retried next time
+    if response == API_ERROR_RESPONSE:
+        return
+    with _response_cache_lock:
+        _response_cache[cache_key] = response
+        if len(_response_cache) > RESPONSE_CACHE_SIZE:
+            _response_cache.popitem(last=False)
+
+
+def vote_response_format(keys, all_characters):
+    """
+    Build a structured-output response format whose values must be character names.
+    
+    Args:
+        keys (list): JSON keys the reply must contain
+        all_characters: List of Character objects the values are restricted to
+    
+    Returns:
+        dict: response_format for the chat completions API
+    """
+    name_enum = {"type": "string", "enum": [char.name for char in all_characters]}
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "votes",
+            "strict": True,
+            "schema": {
+                "type": "object",
+                "properties": {key: name_enum for key in keys},
+                "required": list(keys),
+                "additionalProperties": False,
+            },
+        },
+    }
+
+
+def parse_structured_vote(response, all_characters):
+    """
+    Read the vote from a reply constrained by vote_response_format(["vote"], ...).
+    
+    Returns:
+        str: The character name, or None if the reply is not a valid structured vote
+    """
+    try:
+        vote = orjson.loads(response).get("vote")
+    except (ValueError, AttributeError):
+        return None
+    return vote if any(char.name == vote for char in all_characters) else None
+
+
+def _make_session():
+    """Create a requests session whose connection pool is shared by all threads."""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=MAX_KEEPALIVE_CONNECTIONS, pool_maxsize=MAX_CONNECTIONS
+    )
+    session.mount("https://", adapter)
+    return session
+
+
+# Used by openai.ChatCompletion.create instead of a new session per thread
+openai.requestssession = _make_session()
+
+
+@functools.lru_cache(maxsize=1)
+def _auth_headers(api_key, organization):
+    """Headers for a direct API request (rebuilt only if the key or organization changes)."""
+    headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+    if organization:
+        headers["OpenAI-Organization"] = organization
+    return headers
+
+
+def _api_error(status, content):
+    """Build the openai.error exception matching a failed direct API request."""
+    try:
+        message = orjson.loads(content)["error"]["message"]
+    except (ValueError, KeyError, TypeError):
+        message = content.decode(errors="replace") if isinstance(content, bytes) else str(content)
+    if status == 429:
+        return openai.error.RateLimitError(message, http_status=status)
+    if status in (502, 503, 504):
+        return openai.error.ServiceUnavailableError(message, http_status=status)
+    if status >= 500:
+        return openai.error.APIError(message, http_status=status)
+    if status in (401, 403):
+        return openai.error.AuthenticationError(message, http_status=status)
+    return openai.error.InvalidRequestError(message, None, http_status=status)
+
+
+def _reply_text(status, content):
+    """Read the reply text out of a chat completion response body."""
+    if status != 200:
+        raise _api_error(status, content)
+    return orjson.loads(content)["choices"][0]["message"]["content"]
+
+
+def _post_chat_completion(kwargs):
+    """POST a chat completion over the shared requests session and return the reply text."""
+    try:
+        response = openai.requestssession.post(
+            f"{openai.api_base}/chat/completions",
+            headers=_auth_headers(openai.api_key, openai.organization),
+            data=orjson.dumps(kwargs),
+            timeout=REQUEST_TIMEOUT,
+        )
+    except requests.Timeout as e:
+        raise openai.error.Timeout(str(e)) from e
+    except requests.RequestException as e:
+        raise openai.error.APIConnectionError(str(e)) from e
+    return _reply_text(response.status_code, response.content)
+
+
+async def _post_chat_completion_async(kwargs):
+    """Async variant of _post_chat_completion, over the shared aiohttp session."""
+    session = await _get_aiohttp_session()
+    try:
+        async with session.post(
+            f"{openai.api_base}/chat/completions",
+            headers=_auth_headers(openai.api_key, openai.organization),
+            data=orjson.dumps(kwargs),
+            timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
+        ) as response:
+            content = await response.read()
+    except asyncio.TimeoutError as e:
+        raise openai.error.Timeout(str(e)) from e
+    except aiohttp.ClientError as e:
+        raise openai.error.APIConnectionError(str(e)) from e
+    return _reply_text(response.status, content)
+
+
+def _with_retries(send, kwargs):
+    """
+    Send a request once rate-limit capacity and a request slot are available,
+    retrying transient failures.
+    
+    The last error is raised once MAX_ATTEMPTS is exhausted.
+    """
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        time.sleep(_reserve_capacity(kwargs))
+        try:
+            with _request_slots:
+                return send(kwargs)
+        except RETRYABLE_ERRORS as e:
+            if attempt == MAX_ATTEMPTS:
+                raise
+            wait = _retry_wait(attempt)
+            logger.warning("OpenAI request failed (%s), retrying in %.1fs", e, wait)
+            time.sleep(wait)
+
+
+async def _with_retries_async(send, kwargs):
+    """Async variant of _with_retries."""
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        await asyncio.sleep(_reserve_capacity(kwargs))
+        try:
+            async with _get_async_request_slots():
+                return await send(kwargs)
+        except RETRYABLE_ERRORS as e:
+            if attempt == MAX_ATTEMPTS:
+                raise
+            wait = _retry_wait(attempt)
+            logger.warning("OpenAI request failed (%s), retrying in %.1fs", e, wait)
+            await asyncio.sleep(wait)
+
+
+def chat_completion(**kwargs):
+    """
+    Create a chat completion over the shared connection pool.
+    
+    Waits for rate-limit capacity first and retries transient failures;
+    the last error is raised once MAX_ATTEMPTS is exhausted.
+    
+    Returns:
+        str: The reply text
+    """
+    # Posted directly: the SDK's response objects cost more Python time
+    # than the one field the game reads from them
+    return _with_retries(_post_chat_completion, kwargs)
+
+
+def _stream_error(error, streamed):
+    """
+    Map an error raised while a streamed reply was being read to the error to raise.
+    
+    Until text has been passed on, the error is treated like a failed request
+    (transport errors become their retryable openai.error equivalents). Once part
+    of the reply has been shown, a retry would show it again, so the error is
+    raised as a plain OpenAIError, which is not retried.
+    """
+    if streamed:
+        return openai.error.OpenAIError(f"Streamed reply interrupted: {error}")
+    if isinstance(error, (requests.Timeout, asyncio.TimeoutError)):
+        return openai.error.Timeout(str(error))
+    if isinstance(error, (requests.RequestException, aiohttp.ClientError)):
+        return openai.error.APIConnectionError(str(error))
+    return error
+
+
+def _pass_on_delta(chunk, parts, on_delta):
+    """Collect a streamed chunk's text delta and pass it to on_delta."""
+    delta = chunk.choices[0].delta.get("content") if chunk.choices else None
+    if delta:
+        parts.append(delta)
+        on_delta(delta)
+
+
+def stream_chat_completion(on_delta, **kwargs):
+    """
+    Create a streamed chat completion, passing each text delta to on_delta as it arrives.
+    
+    The stream is read inside the request, so it holds its request slot until
+    the reply is complete, and errors while reading it are retried like failed
+    requests as long as no text has been passed on yet.
+    
+    Returns:
+        str: The complete reply text
+    """
+    def send(request):
+        parts = []
+        try:
+            for chunk in openai.ChatCompletion.create(stream=True, request_timeout=REQUEST_TIMEOUT, **request):
+                _pass_on_delta(chunk, parts, on_delta)
+        except Exception as e:
+            error = _stream_error(e, bool(parts))
+            if error is e:
+                raise
+            raise error from e
+        return "".join(parts)
+    
+    return _with_retries(send, kwargs)
+
+
+async def chat_completion_async(**kwargs):
+    """
+    Create a chat completion without blocking the event loop.
+
+    Must run inside run_concurrently, whose aiohttp session the request reuses.
+    Rate limiting and retries work as in chat_completion.
+
+    Returns:
+        str: The reply text
+    """
+    return await _with_retries_async(_post_chat_completion_async, kwargs)
+
+
+async def stream_chat_completion_async(on_delta, **kwargs):
+    """Async variant of stream_chat_completion."""
+    async def send(request):
+        parts = []
+        try:
+            response = await openai.ChatCompletion.acreate(stream=True, request_timeout=REQUEST_TIMEOUT, **request)
+            async for chunk in response:
+                _pass_on_delta(chunk, parts, on_delta)
+        except Exception as e:
+            error = _stream_error(e, bool(parts))
+            if error is e:
+                raise
+            raise error from e
+        return "".join(parts)
+    
+    return await _with_retries_async(send, kwargs)
+
+
+# Event loop (on a background thread) and aiohttp session shared by all async calls,
+# so their pooled connections stay warm between batches instead of being torn down
+_event_loop = None
+_event_loop_lock = threading.Lock()
+_aiohttp_session = None
+
+
+def _get_event_loop():
+    """Start the shared background event loop on first use."""
+    global _event_loop
+    with _event_loop_lock:
+        if _event_loop is None:
+            _event_loop = asyncio.new_event_loop()
+            threading.Thread(target=_event_loop.run_forever, name="openai-event-loop", daemon=True).start()
+    return _event_loop
+
+
+async def _get_aiohttp_session():
+    """Get the shared aiohttp session (runs on the background event loop)."""
+    global _aiohttp_session
+    if _aiohttp_session is None or _aiohttp_session.closed:
+        connector = aiohttp.TCPConnector(limit=MAX_CONNECTIONS, keepalive_timeout=60)
+        _aiohttp_session = aiohttp.ClientSession(connector=connector)
+    return _aiohttp_session
+
+
+@atexit.register
+def _close_aiohttp_session():
+    """Close the shared aiohttp session when the process exits."""
+    if _event_loop is not None and _aiohttp_session is not None and not _aiohttp_session.closed:
+        asyncio.run_coroutine_threadsafe(_aiohttp_session.close(), _event_loop).result(timeout=5)
+
+
+def run_concurrently(coroutines):
+    """
+    Run coroutines concurrently from synchronous code.
+
+    The coroutines run on a shared background event loop and their requests go
+    through one long-lived aiohttp session, so connections opened by earlier
+    batches are reused instead of paying a new TLS handshake.
+
+    Returns:
+        list: Results in the same order as the coroutines
+    """
+    async def gather_all():
+        openai.aiosession.set(await _get_aiohttp_session())
+        return await asyncio.gather(*coroutines)
+
+    return asyncio.run_coroutine_threadsafe(gather_all(), _get_event_loop()).result()
+
+
+async def _warm_up_aiohttp_session():
+    """Open a connection to the API in the shared aiohttp session's pool."""
+    session = await _get_aiohttp_session()
+    async with session.head(openai.api_base, timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)):
+        pass
+
+
+def warm_up_connections():
+    """
+    Open connections to the API in the background, for both the requests and the
+    aiohttp pool, so the first calls of a game skip the TCP and TLS handshakes.
+
+    Meant for while the game waits on the player anyway. Failures are only logged,
+    since the real requests connect (and report errors) on their own.
+    """
+    def warm_up():
+        try:
+            openai.requestssession.head(openai.api_base, timeout=REQUEST_TIMEOUT)
+            asyncio.run_coroutine_threadsafe(_warm_up_aiohttp_session(), _get_event_loop()).result()
+        except Exception as e:
+            logger.debug("Connection warm-up failed: %s", e)
+
+    threading.Thread(target=warm_up, name="openai-warm-up", daemon=True).start()
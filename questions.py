@@ -1,6 +1,7 @@
 """
 Question bank for the Reverse Turing Test game.
 """
+import functools
 
 class Question:
     def __init__(self, text, category):
@@ -15,11 +16,14 @@ class Question:
         self.category = category
 
 
+@functools.lru_cache(maxsize=1)
 def get_question_bank():
     """
-    Returns a list of predefined questions for the game.
+    Returns the predefined questions for the game.
+    
+    Questions are never modified, so the bank is built once and shared by every game.
     """
-    return [
+    return (
         # Ethical dilemmas
         Question(
             "If you had to choose between saving a famous artist or a brilliant scientist in a crisis, who would you choose and why?",
@@ -89,7 +93,7 @@ def get_question_bank():
             "Do you believe space exploration should be a priority for humanity? Why or why not?",
             "Opinion"
         ),
-    ]
+    )
 
 
 def select_game_questions(question_bank, num_questions=5):
@@ -97,7 +101,7 @@ def select_game_questions(question_bank, num_questions=5):
     Select a diverse set of questions for a game.
     
     Args:
-        question_bank (list): List of Question objects
+        question_bank (sequence): Question objects
         num_questions (int): Number of questions to select
     
     Returns:
@@ -50,6 +50,20 @@ const screens = {
 
 const loadingOverlay = document.getElementById('loading-overlay');
 
+// Socket.IO connection the server streams AI responses over while they are generated
+const socket = typeof io !== 'undefined' ? io() : null;
+
+if (socket) {
+    // (Re)join the current game's room whenever the connection is (re)established
+    socket.on('connect', () => {
+        if (gameState.gameId) {
+            socket.emit('join_game', { game_id: gameState.gameId });
+        }
+    });
+    socket.on('ai_token_batch', data => appendStreamedText('responses-list', data.name, data.tokens));
+    socket.on('ai_suspicion_batch', data => appendStreamedText('interrogation-suspicions-list', data.name, data.tokens, true));
+}
+
 // Character avatar colors
 const avatarColors = {
     'Dr. Alex Morgan': 'avatar-tech',
@@ -186,6 +200,10 @@ async function startGame() {
         gameState.gameId = data.game_id;
         gameState.characters = data.characters;
         
+        if (socket && socket.connected) {
+            socket.emit('join_game', { game_id: gameState.gameId });
+        }
+        
         // Show character selection screen
         displayCharacterSelection();
         
@@ -257,8 +275,22 @@ async function submitResponse() {
         return;
     }
     
+    // With a Socket.IO connection, show the AI responses as they are written
+    const stream = socket !== null && socket.connected;
+    const continueButton = document.getElementById('continue-to-suspicions-button');
+    
     try {
-        showLoading('AI characters are thinking...');
+        if (stream) {
+            gameState.responses = [{
+                character_name: gameState.humanCharacter.name,
+                response: response
+            }];
+            displayResponses();
+            continueButton.disabled = true;
+            showScreen('responses');
+        } else {
+            showLoading('AI characters are thinking...');
+        }
         
         const apiResponse = await fetch('/api/submit_response', {
             method: 'POST',
@@ -267,7 +299,8 @@ async function submitResponse() {
             },
             body: JSON.stringify({
                 game_id: gameState.gameId,
-                response: response
+                response: response,
+                stream: stream
             })
         });
         
@@ -283,15 +316,34 @@ async function submitResponse() {
         // Show responses screen
         displayResponses();
         
+        continueButton.disabled = false;
         hideLoading();
         showScreen('responses');
     } catch (error) {
         console.error('Error submitting response:', error);
+        continueButton.disabled = false;
         hideLoading();
+        if (stream) {
+            showScreen('question');
+        }
         alert('Failed to submit response. Please try again.');
     }
 }
 
+function appendStreamedText(listId, characterName, text, isSuspicion = false) {
+    // Append streamed text to the character's bubble in a list, creating it on the first batch
+    const list = document.getElementById(listId);
+    let bubble = Array.from(list.children).find(
+        child => child.dataset.characterName === characterName
+    );
+    if (!bubble) {
+        bubble = createMessageBubble(characterName, '', isSuspicion);
+        bubble.dataset.characterName = characterName;
+        list.appendChild(bubble);
+    }
+    bubble.querySelector('.message-text').textContent += text;
+}
+
 async function submitSuspicion() {
     const suspicionInput = document.getElementById('suspicion-input');
     const suspicion = suspicionInput.value.trim();
@@ -373,28 +425,77 @@ async function submitSuspicion() {
     }
 }
 
-async function autoSubmitVote() {
-    try {
-        showLoading('Judges are discussing and voting...');
-        
-        // In standard mode, we don't need a specific vote from the human player
-        // Just submit an empty vote to trigger the judge voting process
-        const response = await fetch('/api/submit_vote', {
+async function postVote(vote) {
+    // Submit a vote and return its result. With a Socket.IO connection the server
+    // runs the vote in the background and the result arrives as a 'votes_ready' event
+    // (polled for as well, in case the event is missed).
+    const background = socket !== null && socket.connected;
+    let resolveVotesReady;
+    const votesReady = new Promise(resolve => { resolveVotesReady = resolve; });
+    if (background) {
+        socket.once('votes_ready', resolveVotesReady);
+    }
+    
+    const response = await fetch('/api/submit_vote', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        },
+        body: JSON.stringify({
+            game_id: gameState.gameId,
+            vote: vote,
+            background: background
+        })
+    });
+    
+    if (!response.ok) {
+        throw new Error('Failed to submit vote');
+    }
+    
+    let data;
+    if (response.status === 202) {
+        data = await Promise.race([votesReady, pollVoteResult()]);
+    } else {
+        data = await response.json();
+    }
+    if (background) {
+        socket.off('votes_ready', resolveVotesReady);
+    }
+    if (data.error) {
+        throw new Error(data.error);
+    }
+    return data;
+}
+
+async function pollVoteResult(intervalMs = 3000) {
+    // Poll for the result of a vote running in the background
+    while (true) {
+        await new Promise(resolve => setTimeout(resolve, intervalMs));
+        const response = await fetch('/api/get_vote_result', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json'
             },
             body: JSON.stringify({
-                game_id: gameState.gameId,
-                vote: ''
+                game_id: gameState.gameId
             })
         });
-        
         if (!response.ok) {
-            throw new Error('Failed to submit vote');
+            throw new Error('Failed to get vote result');
+        }
+        if (response.status !== 202) {
+            return response.json();
         }
+    }
+}
+
+async function autoSubmitVote() {
+    try {
+        showLoading('Judges are discussing and voting...');
         
-        const data = await response.json();
+        // In standard mode, we don't need a specific vote from the human player
+        // Just submit an empty vote to trigger the judge voting process
+        const data = await postVote('');
         
         // Update game state
         gameState.humanWon = data.human_won;
@@ -439,22 +540,7 @@ async function submitVote(votedCharacterName) {
     try {
         showLoading('Collecting votes...');
         
-        const response = await fetch('/api/submit_vote', {
-            method: 'POST',
-            headers: {
-                'Content-Type': 'application/json'
-            },
-            body: JSON.stringify({
-                game_id: gameState.gameId,
-                vote: votedCharacterName
-            })
-        });
-        
-        if (!response.ok) {
-            throw new Error('Failed to submit vote');
-        }
-        
-        const data = await response.json();
+        const data = await postVote(votedCharacterName);
         
         // Update game state
         gameState.humanWon = data.human_won;
@@ -1256,8 +1342,23 @@ async function submitInterrogationSuspicion() {
         return;
     }
     
+    // With a Socket.IO connection, show the AI suspicions as they are written
+    const stream = socket !== null && socket.connected;
+    const inputContainer = document.getElementById('interrogation-suspicion-input-container');
+    const listContainer = document.getElementById('interrogation-suspicions-list-container');
+    const suspicionsList = document.getElementById('interrogation-suspicions-list');
+    const continueButton = document.getElementById('continue-after-interrogation-suspicions-button');
+    
     try {
-        showLoading('AI characters are thinking...');
+        if (stream) {
+            suspicionsList.innerHTML = '';
+            suspicionsList.appendChild(createMessageBubble(gameState.humanCharacter.name, suspicion, true));
+            inputContainer.classList.add('d-none');
+            listContainer.classList.remove('d-none');
+            continueButton.disabled = true;
+        } else {
+            showLoading('AI characters are thinking...');
+        }
         
         const response = await fetch('/api/submit_interrogation_suspicion', {
             method: 'POST',
@@ -1266,7 +1367,8 @@ async function submitInterrogationSuspicion() {
             },
             body: JSON.stringify({
                 game_id: gameState.gameId,
-                suspicion: suspicion
+                suspicion: suspicion,
+                stream: stream
             })
         });
         
@@ -1277,11 +1379,10 @@ async function submitInterrogationSuspicion() {
         const data = await response.json();
         
         // Hide input container and show suspicions list
-        document.getElementById('interrogation-suspicion-input-container').classList.add('d-none');
-        document.getElementById('interrogation-suspicions-list-container').classList.remove('d-none');
+        inputContainer.classList.add('d-none');
+        listContainer.classList.remove('d-none');
         
         // Display all suspicions
-        const suspicionsList = document.getElementById('interrogation-suspicions-list');
         suspicionsList.innerHTML = '';
         
         data.suspicions.forEach(suspicionData => {
@@ -1293,10 +1394,16 @@ async function submitInterrogationSuspicion() {
         gameState.nextAction = data.next_action;
         gameState.nextRound = data.next_round;
         
+        continueButton.disabled = false;
         hideLoading();
     } catch (error) {
         console.error('Error submitting suspicion:', error);
+        continueButton.disabled = false;
         hideLoading();
+        if (stream) {
+            listContainer.classList.add('d-none');
+            inputContainer.classList.remove('d-none');
+        }
         alert('Failed to submit suspicion. Please try again.');
     }
 }
@@ -1313,95 +1420,130 @@ function handleAfterInterrogationSuspicions() {
 }
 
 // Conversation History Functions
+
+// ETag of the history shown in the panel; the server answers 304 while it is current
+let conversationHistoryETag = null;
+
 async function fetchConversationHistory() {
     try {
         if (!gameState.gameId) return;
         
-        const response = await fetch('/api/get_conversation_history', {
+        const headers = {
+            'Content-Type': 'application/json'
+        };
+        if (conversationHistoryETag) {
+            headers['If-None-Match'] = conversationHistoryETag;
+        }
+        
+        const response = await fetch('/api/stream_conversation_history', {
             method: 'POST',
-            headers: {
-                'Content-Type': 'application/json'
-            },
+            headers: headers,
             body: JSON.stringify({
                 game_id: gameState.gameId
             })
         });
         
+        if (response.status === 304) {
+            // Nothing new since the panel was filled
+            return;
+        }
+        
         if (!response.ok) {
             throw new Error('Failed to fetch conversation history');
         }
         
-        const data = await response.json();
-        displayConversationHistory(data.conversation_history);
+        // The history arrives as one JSON entry per line; show each entry as soon as its line is complete
+        const historyContent = document.getElementById('conversation-history-content');
+        historyContent.innerHTML = '';
+        
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let pending = '';
+        let currentRound = -1;
+        let entryCount = 0;
+        conversationHistoryETag = null;
+        
+        while (true) {
+            const { done, value } = await reader.read();
+            if (done) break;
+            
+            pending += decoder.decode(value, { stream: true });
+            const lines = pending.split('\n');
+            pending = lines.pop();
+            
+            lines.forEach(line => {
+                if (!line) return;
+                currentRound = appendConversationHistoryItem(historyContent, JSON.parse(line), currentRound);
+                entryCount++;
+            });
+        }
+        
+        // Only a fully read history may be kept on a 304
+        conversationHistoryETag = response.headers.get('ETag');
+        
+        if (entryCount === 0) {
+            historyContent.innerHTML = '<p class="text-muted">No conversation history yet.</p>';
+            return;
+        }
+        
+        // Scroll to bottom
+        historyContent.scrollTop = historyContent.scrollHeight;
     } catch (error) {
         console.error('Error fetching conversation history:', error);
     }
 }
 
-function displayConversationHistory(history) {
-    const historyContent = document.getElementById('conversation-history-content');
-    historyContent.innerHTML = '';
-    
-    if (!history || history.length === 0) {
-        historyContent.innerHTML = '<p class="text-muted">No conversation history yet.</p>';
-        return;
+// Append a history entry, preceded by a round separator when it starts a new round; returns the entry's round
+function appendConversationHistoryItem(historyContent, item, currentRound) {
+    // Add round separator if needed
+    if (item.round !== currentRound) {
+        currentRound = item.round;
+        const roundHeader = document.createElement('div');
+        roundHeader.className = 'round-separator my-3';
+        
+        let roundTitle;
+        if (currentRound === 0) {
+            roundTitle = 'Introductions';
+        } else {
+            roundTitle = `Round ${currentRound}`;
+        }
+        
+        roundHeader.innerHTML = `<h6 class="text-center border-bottom pb-2">${roundTitle}</h6>`;
+        historyContent.appendChild(roundHeader);
     }
     
-    // Group by rounds
-    let currentRound = -1;
+    // Create message element based on type
+    const messageEl = document.createElement('div');
+    messageEl.className = 'history-message mb-2';
+    
+    let messageContent = '';
     
-    history.forEach(item => {
-        // Add round separator if needed
-        if (item.round !== currentRound) {
-            currentRound = item.round;
-            const roundHeader = document.createElement('div');
-            roundHeader.className = 'round-separator my-3';
+    switch (item.type) {
+        case 'introduction':
+            messageContent = `<strong>${item.character}</strong> introduced: "${item.content}"`;
+            messageEl.classList.add('introduction-message');
+            break;
             
-            let roundTitle;
-            if (currentRound === 0) {
-                roundTitle = 'Introductions';
-            } else {
-                roundTitle = `Round ${currentRound}`;
-            }
+        case 'question':
+            messageContent = `<strong>${item.character}</strong> asked <strong>${item.target}</strong>: "${item.content}"`;
+            messageEl.classList.add('question-message');
+            break;
             
-            roundHeader.innerHTML = `<h6 class="text-center border-bottom pb-2">${roundTitle}</h6>`;
-            historyContent.appendChild(roundHeader);
-        }
-        
-        // Create message element based on type
-        const messageEl = document.createElement('div');
-        messageEl.className = 'history-message mb-2';
-        
-        let messageContent = '';
-        
-        switch (item.type) {
-            case 'introduction':
-                messageContent = `<strong>${item.character}</strong> introduced: "${item.content}"`;
-                messageEl.classList.add('introduction-message');
-                break;
-                
-            case 'question':
-                messageContent = `<strong>${item.character}</strong> asked <strong>${item.target}</strong>: "${item.content}"`;
-                messageEl.classList.add('question-message');
-                break;
-                
-            case 'response':
-                messageContent = `<strong>${item.character}</strong> responded to <strong>${item.to}</strong>: "${item.content}"`;
-                messageEl.classList.add('response-message');
-                break;
-                
-            case 'suspicion':
-                messageContent = `<strong>${item.character}'s suspicion</strong>: "${item.content}"`;
-                messageEl.classList.add('suspicion-message');
-                break;
-        }
-        
-        messageEl.innerHTML = messageContent;
-        historyContent.appendChild(messageEl);
-    });
+        case 'response':
+            messageContent = `<strong>${item.character}</strong> responded to <strong>${item.to}</strong>: "${item.content}"`;
+            messageEl.classList.add('response-message');
+            break;
+            
+        case 'suspicion':
+            messageContent = `<strong>${item.character}'s suspicion</strong>: "${item.content}"`;
+            messageEl.classList.add('suspicion-message');
+            break;
+    }
+    
+    messageEl.innerHTML = messageContent;
+    historyContent.appendChild(messageEl);
     
-    // Scroll to bottom
-    historyContent.scrollTop = historyContent.scrollHeight;
+    return currentRound;
 }
 
 function toggleConversationHistory() {
@@ -0,0 +1,66 @@
+"""
+Tests for the NDJSON conversation history stream.
+"""
+import unittest
+
+import orjson
+
+import app
+from character import get_character_profiles
+
+
+class StreamConversationHistoryTest(unittest.TestCase):
+    def setUp(self):
+        characters = get_character_profiles()
+        self.alex, self.maya = characters[0], characters[1]
+        self.game_id = 'stream-test'
+        self.game_state = {
+            'characters': characters,
+            'current_round': 1,
+            'introductions': {self.alex.name: "Hi, I'm Alex.", self.maya.name: "Hello, I'm Maya."},
+            'interrogations': {
+                1: [
+                    {'interrogator': self.alex.name, 'target': self.maya.name,
+                     'question': "What do you teach?", 'response': "History."},
+                ],
+            },
+        }
+        app.game_store.save(self.game_id, self.game_state)
+        self.addCleanup(app.game_store.delete, self.game_id)
+        self.client = app.app.test_client()
+
+    def _post(self, path, **kwargs):
+        return self.client.post(path, json={'game_id': self.game_id}, **kwargs)
+
+    def test_streams_same_entries_as_json_endpoint(self):
+        expected = self._post('/api/get_conversation_history').get_json()['conversation_history']
+        response = self._post('/api/stream_conversation_history')
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        self.assertEqual([orjson.loads(line) for line in response.get_data().splitlines()], expected)
+
+    def test_game_changed_while_stream_is_read(self):
+        response = self._post('/api/stream_conversation_history')
+        body = iter(response.response)
+        first_line = next(body)
+        
+        # Another request starts the next round while the body is still being written
+        self.game_state['current_round'] = 2
+        self.game_state['interrogations'][2] = [
+            {'interrogator': self.maya.name, 'target': self.alex.name,
+             'question': "Which games do you play?", 'response': None},
+        ]
+        self.maya.add_suspicion("Alex seems human.")
+        
+        entries = [orjson.loads(line) for line in [first_line, *body]]
+        self.assertEqual([entry['round'] for entry in entries], [0, 0, 1, 1])
+        
+        # The ETag describes the streamed snapshot, so it no longer matches the changed game
+        etag = response.headers['ETag']
+        self.assertTrue(etag.strip('"').endswith(f'-{len(entries)}'))
+        revalidated = self._post('/api/stream_conversation_history', headers={'If-None-Match': etag})
+        self.assertEqual(revalidated.status_code, 200)
+        self.assertEqual(len(revalidated.get_data().splitlines()), len(entries) + 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
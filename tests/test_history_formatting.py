@@ -0,0 +1,107 @@
+"""
+Tests for the interrogation histories sent in AI prompts: older rounds in brief,
+recent rounds verbatim, and unanswered interrogations on either path.
+"""
+import unittest
+from unittest import mock
+
+import app
+from ai_player import AIPlayer, HISTORY_VERBATIM_ROUNDS, first_sentence, history_text
+from character import get_character_profiles
+from interrogation_mode import InterrogationGameEngine
+
+LONG_RESPONSE = "I grew up by the sea. We fished every summer and sold the catch in town."
+QUESTION = "Where did you grow up? Tell me about it."
+
+
+class HistoryTextTest(unittest.TestCase):
+    def test_brief_keeps_first_sentence(self):
+        self.assertEqual(history_text(LONG_RESPONSE, True), "I grew up by the sea.")
+
+    def test_verbatim_keeps_whole_text(self):
+        self.assertEqual(history_text(LONG_RESPONSE, False), LONG_RESPONSE)
+
+    def test_unanswered_is_empty_on_both_paths(self):
+        self.assertEqual(history_text(None, True), "")
+        self.assertEqual(history_text(None, False), "")
+        self.assertEqual(first_sentence(None), "")
+
+
+class WebRoundHistoryTest(unittest.TestCase):
+    def setUp(self):
+        characters = get_character_profiles()
+        self.human, self.ai_character = characters[0], characters[1]
+        self.game_state = {
+            'characters': characters,
+            'round_history_cache': {},
+            'interrogations': {
+                1: [
+                    {'interrogator': self.ai_character.name, 'target': self.human.name,
+                     'question': QUESTION, 'response': None},
+                    {'interrogator': self.human.name, 'target': self.ai_character.name,
+                     'question': QUESTION, 'response': LONG_RESPONSE},
+                ],
+            },
+        }
+
+    def test_verbatim_round(self):
+        history = app._round_history(self.game_state, 1)
+        self.assertIn(f'{self.human.name} responded: ""\n', history)
+        self.assertIn(f'{self.ai_character.name} responded: "{LONG_RESPONSE}"\n', history)
+        self.assertIn(QUESTION, history)
+
+    def test_brief_round(self):
+        history = app._round_history(self.game_state, 1, brief=True)
+        self.assertIn(f'{self.human.name} responded: ""\n', history)
+        self.assertIn(f'{self.ai_character.name} responded: "I grew up by the sea."\n', history)
+        # Questions are always kept whole
+        self.assertIn(QUESTION, history)
+
+    def test_question_prompt_with_unanswered_brief_round(self):
+        round_num = 1 + HISTORY_VERBATIM_ROUNDS + 1
+        self.assertTrue(app._is_brief_round(1, round_num))
+        ai_player = AIPlayer(self.ai_character)
+        with mock.patch.object(AIPlayer, '_call_openai_api', return_value="Question?") as call:
+            app._generate_ai_question(ai_player, self.human, round_num, self.game_state)
+        prompt = call.call_args[0][0]
+        self.assertIn(f'{self.human.name} responded: ""\n', prompt)
+        self.assertNotIn("None", prompt)
+
+
+class TerminalInterrogationHistoryTest(unittest.TestCase):
+    def setUp(self):
+        self.engine = InterrogationGameEngine(None)
+        self.human, self.ai_character = self.engine.characters[0], self.engine.characters[1]
+        self.engine.interrogation_history = {
+            1: [
+                {'interrogator': self.ai_character, 'target': self.human,
+                 'question': QUESTION, 'response': None},
+                {'interrogator': self.human, 'target': self.ai_character,
+                 'question': QUESTION, 'response': LONG_RESPONSE},
+            ],
+        }
+
+    def test_verbatim_round(self):
+        history = self.engine._format_round_interrogations(1)
+        self.assertIn(f'{self.human.name} responded: ""\n', history)
+        self.assertIn(f'{self.ai_character.name} responded: "{LONG_RESPONSE}"\n', history)
+
+    def test_brief_round(self):
+        history = self.engine._format_round_interrogations(1, brief=True)
+        self.assertIn(f'{self.human.name} responded: ""\n', history)
+        self.assertIn(f'{self.ai_character.name} responded: "I grew up by the sea."\n', history)
+        self.assertIn(QUESTION, history)
+
+    def test_older_rounds_in_brief(self):
+        self.engine.interrogation_history[2] = [
+            {'interrogator': self.human, 'target': self.ai_character,
+             'question': QUESTION, 'response': LONG_RESPONSE},
+        ]
+        history = self.engine._format_interrogation_history(2 + HISTORY_VERBATIM_ROUNDS)
+        round_1, round_2 = history.split("--- ROUND 2 INTERROGATIONS ---\n")
+        self.assertIn('responded: "I grew up by the sea."\n', round_1)
+        self.assertIn(f'responded: "{LONG_RESPONSE}"\n', round_2)
+
+
+if __name__ == '__main__':
+    unittest.main()
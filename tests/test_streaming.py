@@ -0,0 +1,83 @@
+"""
+Tests for the streamed chat completion helpers: request slots are held until a
+stream has been read, and errors while reading are retried only before any
+text has been passed on.
+"""
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import openai
+import requests
+
+import openai_client
+from openai_client import MAX_CONCURRENT_REQUESTS, run_concurrently, stream_chat_completion, stream_chat_completion_async
+
+REQUEST = {"model": "test-model", "messages": [{"role": "user", "content": "Hi"}], "max_tokens": 10}
+
+
+def chunk(text):
+    return SimpleNamespace(choices=[SimpleNamespace(delta={"content": text})])
+
+
+def stream(*items):
+    """Yield the chunks of a streamed reply; exceptions among the items are raised mid-stream."""
+    for item in items:
+        if isinstance(item, Exception):
+            raise item
+        yield chunk(item)
+
+
+async def stream_async(*items):
+    for item in stream(*items):
+        yield item
+
+
+class StreamChatCompletionTest(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(openai_client, "_retry_wait", return_value=0)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_slot_held_until_stream_is_read(self):
+        free_slots = []
+        on_delta = lambda delta: free_slots.append(openai_client._request_slots._value)
+        with mock.patch.object(openai.ChatCompletion, "create", return_value=stream("Hello", " there")):
+            reply = stream_chat_completion(on_delta, **REQUEST)
+        self.assertEqual(reply, "Hello there")
+        self.assertEqual(free_slots, [MAX_CONCURRENT_REQUESTS - 1] * 2)
+        self.assertEqual(openai_client._request_slots._value, MAX_CONCURRENT_REQUESTS)
+
+    def test_error_before_any_text_is_retried(self):
+        streams = [stream(requests.ConnectionError("reset")), stream("Hello")]
+        deltas = []
+        with mock.patch.object(openai.ChatCompletion, "create", side_effect=streams) as create:
+            reply = stream_chat_completion(deltas.append, **REQUEST)
+        self.assertEqual(reply, "Hello")
+        self.assertEqual(deltas, ["Hello"])
+        self.assertEqual(create.call_count, 2)
+
+    def test_error_after_partial_text_is_not_retried(self):
+        deltas = []
+        with mock.patch.object(openai.ChatCompletion, "create",
+                               return_value=stream("Hel", requests.ConnectionError("reset"))) as create:
+            with self.assertRaises(openai.error.OpenAIError) as raised:
+                stream_chat_completion(deltas.append, **REQUEST)
+        self.assertNotIsInstance(raised.exception, openai_client.RETRYABLE_ERRORS)
+        self.assertEqual(deltas, ["Hel"])
+        self.assertEqual(create.call_count, 1)
+
+    def test_async_slot_held_until_stream_is_read(self):
+        free_slots = []
+        on_delta = lambda delta: free_slots.append(openai_client._get_async_request_slots()._value)
+        acreate = mock.AsyncMock(side_effect=[stream_async(requests.ConnectionError("reset")),
+                                              stream_async("Hello", " there")])
+        with mock.patch.object(openai.ChatCompletion, "acreate", acreate):
+            replies = run_concurrently([stream_chat_completion_async(on_delta, **REQUEST)])
+        self.assertEqual(replies, ["Hello there"])
+        self.assertEqual(free_slots, [MAX_CONCURRENT_REQUESTS - 1] * 2)
+        self.assertEqual(acreate.await_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()